@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure cold-start latency of the myria-cluster CLI.
+
+Each sample runs in a fresh interpreter, so it includes interpreter startup and all
+module imports, which is what users pay on every invocation. Also reports which heavy
+dependencies get imported just by loading the CLI module; with --check, exits non-zero
+if any of them are (they should only be imported by the subcommands that need them).
+
+Usage: python benchmarks/cli_startup.py [--samples N] [--check]
+"""
+
+import sys
+import subprocess
+import argparse
+from time import time
+
+# modules that must not be imported until a subcommand actually needs them
+# (pkg_resources is not listed: the `myria` namespace package imports it in development installs)
+HEAVY_MODULES = ['boto', 'requests', 'yaml', 'dateutil', 'multiprocessing']
+
+SCENARIOS = [
+    ("import", "import myria.cluster.scripts.cli"),
+    ("--help", "from myria.cluster.scripts.cli import run; run(['--help'])"),
+    ("create --help", "from myria.cluster.scripts.cli import run; run(['create', '--help'])"),
+    ("describe --help", "from myria.cluster.scripts.cli import run; run(['describe', '--help'])"),
+]
+
+
+def time_command(code, samples):
+    timings = []
+    for _ in range(samples):
+        start = time()
+        with open('/dev/null', 'w') as devnull:
+            subprocess.call([sys.executable, "-c", code], stdout=devnull, stderr=devnull)
+        timings.append(time() - start)
+    return sorted(timings)
+
+
+def eagerly_imported_modules():
+    code = ("import sys, myria.cluster.scripts.cli; "
+            "print(','.join(m for m in %r if m in sys.modules))" % HEAVY_MODULES)
+    output = subprocess.check_output([sys.executable, "-c", code]).decode('utf-8').strip()
+    return [m for m in output.split(',') if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=10, help="number of runs per scenario")
+    parser.add_argument('--check', action='store_true', help="fail if heavy modules are imported at startup")
+    args = parser.parse_args()
+
+    format_str = "{: <20} {: >10} {: >10} {: >10}"
+    print(format_str.format('SCENARIO', 'MIN_MS', 'MEDIAN_MS', 'MAX_MS'))
+    print(format_str.format('--------', '------', '---------', '------'))
+    for name, code in SCENARIOS:
+        timings = time_command(code, args.samples)
+        print(format_str.format(name, "%.1f" % (timings[0] * 1000), "%.1f" % (timings[len(timings) // 2] * 1000),
+                                "%.1f" % (timings[-1] * 1000)))
+
+    eager = eagerly_imported_modules()
+    print("")
+    print("Heavy modules imported at startup: %s" % (', '.join(eager) if eager else "none"))
+    if args.check and eager:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare end-to-end Ansible provisioning time for simulated clusters of different sizes.
+
+Each simulated host is an inventory alias for localhost (ansible_connection=local) that runs a
+playbook shaped like the node-local play in remote.yml: one task per expensive step, each just
+sleeping for that step's typical duration (scaled by --scale) times a per-host jitter factor, to
+model slow downloads and uneven hosts. Every cluster size is run in each mode:
+
+  default:   Ansible's defaults (5 forks, linear strategy), as before sizing forks from the cluster
+  forks:     forks sized by the CLI from the number of hosts, linear strategy
+  adaptive:  forks sized by the CLI from the number of hosts, free strategy (what the CLI now does)
+
+Usage: python benchmarks/provisioning.py [--hosts 5 20 50] [--scale 0.02] [--jitter 0.5] [--seed 0]
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+from time import time
+from distutils.spawn import find_executable
+
+from myria.cluster.scripts.cli import get_ansible_forks
+
+# (task, typical seconds on one host) for the slowest steps of provisioning a node
+SIMULATED_TASKS = [
+    ("Gathering facts", 3),
+    ("Format all data volumes", 8),
+    ("Cache JDK8 tarball to avoid Oracle download", 30),
+    ("Install Java", 60),
+    ("Installing packages", 45),
+    ("Download Hadoop", 30),
+    ("Unarchive Hadoop in install folder", 10),
+    ("Install myria-python dependencies", 150),
+    ("Install RACO", 20),
+    ("Install myria-python", 15),
+    ("Provision Hadoop", 5),
+]
+
+MODES = ["default", "forks", "adaptive"]
+
+PLAYBOOK = """
+- hosts: cluster
+  gather_facts: no
+  strategy: %(strategy)s
+  tasks:
+%(tasks)s
+"""
+
+TASK = """  - name: %(name)s
+    command: sleep {{ durations[%(index)d] }}
+"""
+
+
+def write_inventory(path, host_count, scale, jitter, rng):
+    with open(path, 'w') as f:
+        f.write("[cluster]\n")
+        for host in range(host_count):
+            durations = [round(secs * scale * rng.uniform(1 - jitter, 1 + jitter), 3) for _, secs in SIMULATED_TASKS]
+            f.write("sim-host-%03d ansible_connection=local ansible_python_interpreter=%s durations='%s'\n" % (
+                host, sys.executable, json.dumps(durations)))
+
+
+def write_playbook(path, strategy):
+    tasks = ''.join(TASK % dict(name=name, index=i) for i, (name, _) in enumerate(SIMULATED_TASKS))
+    with open(path, 'w') as f:
+        f.write(PLAYBOOK % dict(strategy=strategy, tasks=tasks))
+
+
+def run_mode(ansible_playbook, tmpdir, inventory_path, host_count, mode):
+    forks = 5 if mode == "default" else get_ansible_forks(host_count)
+    strategy = "free" if mode == "adaptive" else "linear"
+    playbook_path = os.path.join(tmpdir, "%s.yml" % mode)
+    write_playbook(playbook_path, strategy)
+    start = time()
+    with open(os.devnull, 'w') as devnull:
+        status = subprocess.call([ansible_playbook, playbook_path, "--inventory", inventory_path, "--forks", str(forks)],
+                                 stdout=devnull, stderr=devnull)
+    if status != 0:
+        sys.exit("ansible-playbook failed in mode '%s' with %d hosts (exit status %d)" % (mode, host_count, status))
+    return forks, strategy, time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, nargs='+', default=[5, 20, 50], help="simulated cluster sizes")
+    parser.add_argument('--scale', type=float, default=0.02, help="fraction of typical task durations to sleep")
+    parser.add_argument('--jitter', type=float, default=0.5, help="maximum relative per-host variation in task durations")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for per-host task durations")
+    args = parser.parse_args()
+
+    ansible_playbook = find_executable("ansible-playbook")
+    if not ansible_playbook:
+        sys.exit("ansible-playbook not found")
+    rng = random.Random(args.seed)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        format_str = "{: >5} {: <10} {: >5} {: <8} {: >9} {: >8}"
+        print(format_str.format('HOSTS', 'MODE', 'FORKS', 'STRATEGY', 'WALL_SECS', 'SPEEDUP'))
+        print(format_str.format('-----', '----', '-----', '--------', '---------', '-------'))
+        for host_count in args.hosts:
+            inventory_path = os.path.join(tmpdir, "hosts-%d" % host_count)
+            write_inventory(inventory_path, host_count, args.scale, args.jitter, rng)
+            baseline_secs = None
+            for mode in MODES:
+                forks, strategy, wall_secs = run_mode(ansible_playbook, tmpdir, inventory_path, host_count, mode)
+                baseline_secs = baseline_secs or wall_secs
+                print(format_str.format(host_count, mode, forks, strategy, "%.1f" % wall_secs,
+                                        "%.2fx" % (baseline_secs / wall_secs)))
+                sys.stdout.flush()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
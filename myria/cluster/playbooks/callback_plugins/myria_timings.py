@@ -0,0 +1,79 @@
+# Records the duration and outcome of each task on each host, for `myria-cluster` timing traces
+# and retry checkpoints.
+#
+# Enabled by the CLI through ANSIBLE_CALLBACK_PLUGINS/ANSIBLE_CALLBACK_WHITELIST; writes one
+# JSON object per line (task, action, role, play, host, status, start, end) to the file named by
+# the MYRIA_TASK_TIMINGS_FILE environment variable, and does nothing if it is unset.
+#
+# Ansible only tells us when a task starts (for all hosts) and when each host's result
+# arrives, so a host's span for a task starts at the later of the task's start and the
+# end of that host's previous task (which matters for the `free` strategy).
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import json
+from time import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'myria_timings'
+    CALLBACK_NEEDS_WHITELIST = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        path = os.environ.get('MYRIA_TASK_TIMINGS_FILE')
+        self.output = open(path, 'a') if path else None
+        self.play = None
+        self.task_starts = {}
+        self.host_ends = {}
+
+    def v2_playbook_on_play_start(self, play):
+        self.play = play.get_name().strip()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self.task_starts[task._uuid] = time()
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.task_starts[task._uuid] = time()
+
+    def _record(self, result, status):
+        if self.output is None:
+            return
+        end = time()
+        task = result._task
+        host = result._host.get_name()
+        start = max(self.task_starts.get(task._uuid, end), self.host_ends.get(host, 0))
+        self.host_ends[host] = end
+        self.output.write(json.dumps(dict(
+            task=task.get_name().strip(),
+            action=task.action,
+            role=task._role.get_name() if task._role else None,
+            play=self.play,
+            host=host,
+            status=status,
+            start=start,
+            end=end)) + "\n")
+        self.output.flush()
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, 'changed' if result._result.get('changed', False) else 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, 'ignored' if ignore_errors else 'failed')
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, 'skipped')
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, 'unreachable')
+
+    def v2_playbook_on_stats(self, stats):
+        if self.output is not None:
+            self.output.close()
+            self.output = None
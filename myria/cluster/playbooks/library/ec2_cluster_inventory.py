@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# This is a free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This Ansible library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+DOCUMENTATION = '''
+---
+module: ec2_cluster_inventory
+short_description: Get the inventory of a Myria cluster in a single EC2 request
+description:
+    - Returns the running instances of a Myria cluster (only the addresses, DNS names and tags used by our roles),
+      together with the inventory groups (coordinator, workers, cluster and their *_in_scope counterparts) of each.
+    - Instances are sorted by node ID, so that the order of hosts in each group is stable.
+options:
+  cluster_name:
+    description:
+      - Name of the cluster (and of its security group)
+    required: true
+  vpc_id:
+    description:
+      - ID of the VPC the cluster was launched in
+    required: false
+    default: null
+  limit_hosts:
+    description:
+      - Public IP addresses of the hosts in scope for this run (defaults to all hosts)
+    required: false
+    default: null
+  snapshot_file:
+    description:
+      - If this file exists, instances are read from it instead of queried from EC2; otherwise the queried
+        instances are written to it. Lets retries (or a caller that already knows the instances) skip the query.
+    required: false
+    default: null
+extends_documentation_fragment:
+    - aws
+    - ec2
+'''
+
+EXAMPLES = '''
+- ec2_cluster_inventory:
+    region: us-west-2
+    cluster_name: mycluster
+    limit_hosts: ["52.10.1.2", "52.10.1.3"]
+  register: cluster_inventory
+
+- add_host:
+    name: "{{ item.public_ip_address }}"
+    groups: "{{ item.groups | join(',') }}"
+  with_items: "{{ cluster_inventory.hosts }}"
+'''
+
+import os
+import json
+
+try:
+    import boto.ec2
+    from boto.exception import BotoServerError
+    HAS_BOTO = True
+except ImportError:
+    HAS_BOTO = False
+
+def get_instance_info(instance):
+    # only the attributes our roles use (the CLI writes snapshots with the same fields)
+    return {
+        'public_ip_address': instance.ip_address,
+        'private_ip_address': instance.private_ip_address,
+        'public_dns_name': instance.public_dns_name,
+        'private_dns_name': instance.private_dns_name,
+        'tags': dict(instance.tags),
+    }
+
+
+def query_instances(connection, module):
+    filters = {
+        'instance.group-name': module.params.get('cluster_name'),
+        'instance-state-name': 'running',
+    }
+    if module.params.get('vpc_id'):
+        filters['vpc-id'] = module.params.get('vpc_id')
+    try:
+        return [get_instance_info(instance) for instance in connection.get_only_instances(filters=filters)]
+    except BotoServerError as e:
+        module.fail_json(msg=e.message)
+
+
+def get_hosts(instances, limit_hosts):
+    hosts = []
+    # we need to sort workers by stable order to rewrite Myria configuration file when workers are added
+    for instance in sorted(instances, key=lambda i: i['tags'].get('node-id', '')):
+        groups = ['cluster']
+        role = instance['tags'].get('cluster-role')
+        if role == 'coordinator':
+            groups.append('coordinator')
+        elif role == 'worker':
+            groups.append('workers')
+        if limit_hosts is None or instance['public_ip_address'] in limit_hosts:
+            groups.extend(["%s_in_scope" % group for group in groups])
+        hosts.append(dict(instance, groups=groups))
+    return hosts
+
+
+def main():
+    argument_spec = ec2_argument_spec()
+    argument_spec.update(
+        dict(
+            cluster_name = dict(required=True),
+            vpc_id = dict(default=None),
+            limit_hosts = dict(default=None, type='list'),
+            snapshot_file = dict(default=None),
+        )
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec)
+
+    snapshot_file = module.params.get('snapshot_file')
+    if snapshot_file and os.path.exists(snapshot_file):
+        with open(snapshot_file) as f:
+            instances = json.load(f)
+    else:
+        if not HAS_BOTO:
+            module.fail_json(msg='boto required for this module')
+
+        region, ec2_url, aws_connect_params = get_aws_connection_info(module)
+
+        if region:
+            try:
+                connection = connect_to_aws(boto.ec2, region, **aws_connect_params)
+            except (boto.exception.NoAuthHandlerFound, AnsibleAWSError), e:
+                module.fail_json(msg=str(e))
+        else:
+            module.fail_json(msg="region must be specified")
+
+        instances = query_instances(connection, module)
+        if snapshot_file:
+            with open(snapshot_file, 'w') as f:
+                json.dump(instances, f)
+
+    module.exit_json(changed=False, instances=instances, hosts=get_hosts(instances, module.params.get('limit_hosts')))
+
+# import module snippets
+from ansible.module_utils.basic import *
+from ansible.module_utils.ec2 import *
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# gmond Python metric module publishing per-device I/O statistics from /proc/diskstats
+# {{ ansible_managed }}
+#
+# Metric names and units match those previously published by device-metrics.php (from iostat -x),
+# so existing Ganglia graphs keep working. Rates are computed from the difference between two
+# consecutive reads of /proc/diskstats; the file is read at most once per `refresh_secs`, however
+# many metrics gmond asks for.
+
+import re
+import time
+import threading
+
+DISKSTATS_PATH = '/proc/diskstats'
+SECTOR_SIZE_KB = 0.5
+
+# fields of /proc/diskstats after (major, minor, name), see Documentation/iostats.txt
+READS, READS_MERGED, SECTORS_READ, MS_READING, WRITES, WRITES_MERGED, SECTORS_WRITTEN, MS_WRITING, \
+    IOS_IN_PROGRESS, MS_DOING_IO, WEIGHTED_MS_DOING_IO = range(11)
+
+METRICS = [
+    # (suffix, title, units)
+    ('rrqm_s', 'Merged Reads', 'queued reqs/sec'),
+    ('wrqm_s', 'Merged Writes', 'queued reqs/sec'),
+    ('r_s', 'Completed Reads', 'reqs/sec'),
+    ('w_s', 'Completed Writes', 'reqs/sec'),
+    ('rkB_s', 'Data Read', 'kB/sec'),
+    ('wkB_s', 'Data Written', 'kB/sec'),
+    ('avgrq-sz', 'Average Req Size', 'sectors'),
+    ('avgqu-sz', 'Average Req Queue Length', 'sectors'),
+    ('await', 'Await', 'ms'),
+    ('r_await', 'Average Read Await', 'ms'),
+    ('w_await', 'Average Write Await', 'ms'),
+    ('util', 'CPU Time', '%'),
+]
+
+_lock = threading.Lock()
+_refresh_secs = 5.0
+_previous = None    # (timestamp, {device: counters}) of the sample before _current
+_current = None
+_stats = {}         # {device: {suffix: value}} computed from _previous and _current
+_device_re = None
+_metric_names = {}  # {metric name: (device, suffix)}
+
+
+def read_diskstats(device_re):
+    counters = {}
+    with open(DISKSTATS_PATH) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 14 or not device_re.match(fields[2]):
+                continue
+            counters[fields[2]] = [int(v) for v in fields[3:14]]
+    return time.time(), counters
+
+
+def compute_stats(previous, current):
+    (t0, before), (t1, after) = previous, current
+    elapsed = t1 - t0
+    stats = {}
+    for device, c1 in after.items():
+        c0 = before.get(device)
+        if c0 is None or elapsed <= 0:
+            continue
+        d = [b - a for a, b in zip(c0, c1)]
+        ios = d[READS] + d[WRITES]
+        stats[device] = {
+            'rrqm_s': d[READS_MERGED] / elapsed,
+            'wrqm_s': d[WRITES_MERGED] / elapsed,
+            'r_s': d[READS] / elapsed,
+            'w_s': d[WRITES] / elapsed,
+            'rkB_s': d[SECTORS_READ] * SECTOR_SIZE_KB / elapsed,
+            'wkB_s': d[SECTORS_WRITTEN] * SECTOR_SIZE_KB / elapsed,
+            'avgrq-sz': float(d[SECTORS_READ] + d[SECTORS_WRITTEN]) / ios if ios else 0.0,
+            'avgqu-sz': d[WEIGHTED_MS_DOING_IO] / (elapsed * 1000.0),
+            'await': float(d[MS_READING] + d[MS_WRITING]) / ios if ios else 0.0,
+            'r_await': float(d[MS_READING]) / d[READS] if d[READS] else 0.0,
+            'w_await': float(d[MS_WRITING]) / d[WRITES] if d[WRITES] else 0.0,
+            'util': min(100.0, d[MS_DOING_IO] / (elapsed * 10.0)),
+        }
+    return stats
+
+
+def refresh(device_re):
+    global _previous, _current, _stats
+    with _lock:
+        if _current and time.time() - _current[0] < _refresh_secs:
+            return
+        _previous, _current = _current, read_diskstats(device_re)
+        if _previous:
+            _stats = compute_stats(_previous, _current)
+
+
+def metric_handler(name):
+    refresh(_device_re)
+    device, suffix = _metric_names[name]
+    return float(_stats.get(device, {}).get(suffix, 0.0))
+
+
+def metric_init(params):
+    global _refresh_secs, _device_re
+    _refresh_secs = float(params.get('refresh_secs', _refresh_secs))
+    _device_re = re.compile(params.get('devices', r'^(xvd[a-z]+|nvme[0-9]+n[0-9]+|md[0-9]+)$'))
+    refresh(_device_re)
+    descriptors = []
+    for device in sorted(_current[1]):
+        for suffix, title, units in METRICS:
+            name = "dev_%s-%s" % (device, suffix)
+            _metric_names[name] = (device, suffix)
+            descriptors.append({
+                'name': name,
+                'call_back': metric_handler,
+                'time_max': 90,
+                'value_type': 'float',
+                'units': units,
+                'slope': 'both',
+                'format': '%.2f',
+                'description': "dev/%s %s" % (device, title),
+                'groups': 'disk',
+            })
+    return descriptors
+
+
+def metric_cleanup():
+    pass
+
+
+if __name__ == '__main__':
+    # print samples when run by hand, for debugging
+    descriptors = metric_init({'refresh_secs': 1, 'devices': r'^[a-z]+$'})
+    while True:
+        time.sleep(1)
+        for d in descriptors:
+            print("%s = %.2f %s" % (d['name'], d['call_back'](d['name']), d['units']))
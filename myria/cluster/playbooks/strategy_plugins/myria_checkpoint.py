@@ -0,0 +1,68 @@
+# Linear strategy that skips tasks already completed on a host by an earlier attempt,
+# so that a retried host restarts at its first failing task.
+#
+# Before retrying a failed playbook run, the CLI writes {host: [checkpoint key, ...]} to the
+# file named by the MYRIA_CHECKPOINT_FILE environment variable, from the task results recorded
+# by the myria_timings callback plugin; with no such file this is just the linear strategy.
+# A checkpoint key is "play|role|task name" (the CLI drops a key if any task with that name failed).
+#
+# Tasks that register results, set facts or notify handlers are always re-run, since later
+# tasks and handlers depend on them; all our tasks are idempotent, so this is always safe.
+# Handlers always run when notified.
+#
+# CheckpointMixin is shared with the myria_checkpoint_free strategy. It overrides _queue_task() and
+# uses _blocked_hosts and iterator._play, which are private to Ansible's strategy plugins, so it
+# refuses to run on any Ansible release but the one it was written against (see setup.py).
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import json
+
+from ansible import __version__ as ansible_version
+from ansible.errors import AnsibleError
+from ansible.playbook.handler import Handler
+from ansible.plugins.strategy.linear import StrategyModule as LinearStrategyModule
+
+SUPPORTED_ANSIBLE_VERSION = '2.1.'
+ALWAYS_RUN_ACTIONS = frozenset(['meta', 'include', 'include_vars', 'set_fact', 'add_host', 'group_by'])
+
+
+def checkpoint_key(play, task):
+    role = task._role.get_name() if task._role else ''
+    return "%s|%s|%s" % (play.get_name().strip(), role, task.get_name().strip())
+
+
+class CheckpointMixin(object):
+    def __init__(self, tqm):
+        if not ansible_version.startswith(SUPPORTED_ANSIBLE_VERSION):
+            raise AnsibleError("The myria_checkpoint strategies only support Ansible %sx, not %s" % (
+                SUPPORTED_ANSIBLE_VERSION, ansible_version))
+        super(CheckpointMixin, self).__init__(tqm)
+        self._checkpoints = {}
+        self._checkpoint_play = None
+        path = os.environ.get('MYRIA_CHECKPOINT_FILE')
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._checkpoints = dict((host, frozenset(keys)) for host, keys in json.load(f).items())
+
+    def run(self, iterator, play_context):
+        self._checkpoint_play = iterator._play
+        return super(CheckpointMixin, self).run(iterator, play_context)
+
+    def _completed(self, host, task):
+        if isinstance(task, Handler) or task.action in ALWAYS_RUN_ACTIONS or task.register or task.notify:
+            return False
+        return checkpoint_key(self._checkpoint_play, task) in self._checkpoints.get(host.get_name(), ())
+
+    def _queue_task(self, host, task, task_vars, play_context):
+        if self._checkpoints and self._completed(host, task):
+            # no result will arrive for this host, so don't leave it waiting for one
+            self._blocked_hosts[host.get_name()] = False
+            return
+        super(CheckpointMixin, self)._queue_task(host, task, task_vars, play_context)
+
+
+class StrategyModule(CheckpointMixin, LinearStrategyModule):
+    pass
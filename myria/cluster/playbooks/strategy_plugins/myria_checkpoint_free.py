@@ -0,0 +1,19 @@
+# Free strategy (each host runs through its tasks as fast as it can, without waiting for
+# the other hosts at each task) that skips tasks already completed on a host by an earlier
+# attempt, as described in myria_checkpoint.py. Used for the node-local plays in remote.yml.
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import imp
+
+from ansible.plugins.strategy.free import StrategyModule as FreeStrategyModule
+
+# strategy plugins are not importable by module name, so load our sibling by path
+myria_checkpoint = imp.load_source('myria_checkpoint_strategy',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'myria_checkpoint.py'))
+
+
+class StrategyModule(myria_checkpoint.CheckpointMixin, FreeStrategyModule):
+    pass
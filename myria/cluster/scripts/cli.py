@@ -6,51 +6,99 @@ import os
 import os.path
 import stat
 import traceback
+import atexit
+import functools
 import subprocess
-from time import sleep
+import signal
+import threading
+import random
+import re
+import heapq
+import pipes
+from time import sleep, time
+from datetime import datetime, timedelta
 from tempfile import mkdtemp
-from collections import namedtuple
+from collections import namedtuple, Counter, Mapping
 from copy import deepcopy
+from contextlib import contextmanager
 from string import ascii_lowercase
 from operator import itemgetter, attrgetter
 from math import floor, ceil
-from dateutil.parser import parse as dateparse
 import click
-import yaml
 import json
-import requests
 
-import boto
-import boto.ec2
-import boto.vpc
-import boto.iam
-from boto.exception import EC2ResponseError
-from boto.ec2.blockdevicemapping import BlockDeviceType, EBSBlockDeviceType, BlockDeviceMapping
-from boto.ec2.networkinterface import NetworkInterfaceSpecification, NetworkInterfaceCollection
+# Heavy dependencies (boto, requests, yaml, dateutil, pkg_resources, multiprocessing) are imported
+# inside the functions that use them, so that `--help` and the cache-backed read-only commands
+# start quickly. benchmarks/cli_startup.py checks that none of them are imported at startup.
 
 from myria.cluster.playbooks import playbooks_dir
 
-from distutils.spawn import find_executable
 from distutils.util import strtobool
-import pkg_resources
 
 # disable boto logging to console
 import logging
 logging.getLogger('boto').propagate = False
 
-VERSION = pkg_resources.get_distribution("myria-cluster").version
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
 SCRIPT_NAME = os.path.basename(sys.argv[0])
-# we want to use only the Ansible executable in our dependent package
-ANSIBLE_EXECUTABLE_PATH = find_executable("ansible-playbook")
+
+
+class LazyDict(Mapping):
+    """Read-only mapping whose contents are computed by `loader` on first access."""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            self._data = self._loader()
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+def load_ansible_global_vars():
+    import yaml
+    with open(os.path.join(playbooks_dir, "group_vars/all"), 'r') as f:
+        return yaml.load(f)
+
 
 # FIXME: this assumes there are no template expressions in this file, which is not the case!
-ANSIBLE_GLOBAL_VARS = yaml.load(file(os.path.join(playbooks_dir, "group_vars/all"), 'r'))
+ANSIBLE_GLOBAL_VARS = LazyDict(load_ansible_global_vars)
 MAX_RETRIES_DEFAULT = 5
+# Ansible forks are sized from the number of hosts, between its default and a cap on local processes
+ANSIBLE_FORKS_MIN = 5
+ANSIBLE_FORKS_MAX = 100
+ANSIBLE_FORKS_PER_CPU = 10
+# the coordinator's artifact cache is already serving when we add workers to a running cluster
+# (unless the cluster predates it), so don't wait long for it
+ARTIFACT_CACHE_RESIZE_WAIT_SECS = 30
+
+# SSH connection multiplexing, shared between Ansible and our own ssh invocations
+SSH_CONTROL_PATH = "/tmp/ansible-ssh-%h-%p-%r"
+SSH_CONTROL_PERSIST = "600s"
+SSH_PARALLELISM_DEFAULT = 20
+
+# fio jobs run by `benchmark-volumes`, one after another: (job name, fio I/O pattern, block size, queue depth)
+VOLUME_BENCHMARK_JOBS = [
+    ("sequential-read", "read", "1M", 32),
+    ("sequential-write", "write", "1M", 32),
+    ("random-read", "randread", "4k", 64),
+    ("random-write", "randwrite", "4k", 64),
+]
 
 # Ansible configuration variables
-os.environ['ANSIBLE_SSH_ARGS'] = "-o ControlMaster=auto -o ControlPersist=600s -o ControlPath=/tmp/ansible-ssh-%h-%p-%r -o UserKnownHostsFile=/dev/null"
+os.environ['ANSIBLE_SSH_ARGS'] = "-o ControlMaster=auto -o ControlPersist=%s -o ControlPath=%s -o UserKnownHostsFile=/dev/null" % (
+    SSH_CONTROL_PERSIST, SSH_CONTROL_PATH)
 os.environ['ANSIBLE_RECORD_HOST_KEYS'] = "False"
 os.environ['ANSIBLE_HOST_KEY_CHECKING'] = "False"
 os.environ['ANSIBLE_SSH_PIPELINING'] = "True"
@@ -74,6 +122,7 @@ DEFAULTS = dict(
     data_volume_size_gb=20,
     data_volume_type='gp2',
     data_volume_count=1,
+    volume_layout='separate',
     driver_mem_gb=0.5,
     heap_mem_fraction=0.9,
     cluster_log_level='WARN',
@@ -259,24 +308,27 @@ EBS_OPTIMIZED_INSTANCE_TYPES = [
 ]
 
 
-MEM_ALLOC_INCREMENT_MB = int(ANSIBLE_GLOBAL_VARS['mem_alloc_increment_mb'])
+def get_mem_alloc_increment_mb():
+    return int(ANSIBLE_GLOBAL_VARS['mem_alloc_increment_mb'])
 
 
 def round_gb_to_lower_increment(mem_alloc_gb):
+    mem_alloc_increment_mb = get_mem_alloc_increment_mb()
     mem_alloc_mb = int(mem_alloc_gb * 1024)
-    quotient = mem_alloc_mb // MEM_ALLOC_INCREMENT_MB
-    rounded_mem_alloc_mb = MEM_ALLOC_INCREMENT_MB * quotient
+    quotient = mem_alloc_mb // mem_alloc_increment_mb
+    rounded_mem_alloc_mb = mem_alloc_increment_mb * quotient
     # round down to 2 decimal places
     rounded_mem_alloc_gb = float(rounded_mem_alloc_mb) / 1024
     return floor(rounded_mem_alloc_gb * 100) / 100.0
 
 
 def round_gb_to_higher_increment(mem_alloc_gb):
+    mem_alloc_increment_mb = get_mem_alloc_increment_mb()
     mem_alloc_mb = int(mem_alloc_gb * 1024)
     rounded_mem_alloc_mb = mem_alloc_mb
-    remainder = mem_alloc_mb % MEM_ALLOC_INCREMENT_MB
+    remainder = mem_alloc_mb % mem_alloc_increment_mb
     if remainder > 0:
-        rounded_mem_alloc_mb = mem_alloc_mb + MEM_ALLOC_INCREMENT_MB - remainder
+        rounded_mem_alloc_mb = mem_alloc_mb + mem_alloc_increment_mb - remainder
     # round up to 2 decimal places
     rounded_mem_alloc_gb = float(rounded_mem_alloc_mb) / 1024
     return ceil(rounded_mem_alloc_gb * 100) / 100.0
@@ -333,86 +385,135 @@ class InstanceTypeConfig(object):
         return str(self.__dict__)
 
 
-INSTANCE_TYPE_DEFAULTS = {
-    't2.medium': InstanceTypeConfig(node_mem_gb=3.0, node_vcores=2),
-    't2.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
-    't2.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
-    't2.2xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=8),
-    'c1.medium': InstanceTypeConfig(node_mem_gb=1.2, node_vcores=2),
-    'c1.xlarge': InstanceTypeConfig(node_mem_gb=5.5, node_vcores=8),
-    'c3.large': InstanceTypeConfig(node_mem_gb=3.0, node_vcores=2),
-    'c3.xlarge': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=4),
-    'c3.2xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=8),
-    'c3.4xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=16),
-    'c3.8xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=32),
-    'c4.large': InstanceTypeConfig(node_mem_gb=3.0, node_vcores=2),
-    'c4.xlarge': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=4),
-    'c4.2xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=8),
-    'c4.4xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=16),
-    'c4.8xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=36),
-    'cc2.8xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=32),
-    'i2.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
-    'i2.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
-    'i2.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
-    'i2.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
-    'hi1.4xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=16),
-    'm1.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
-    'm1.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
-    'm2.xlarge': InstanceTypeConfig(node_mem_gb=14.0, node_vcores=2),
-    'm2.2xlarge': InstanceTypeConfig(node_mem_gb=28.0, node_vcores=4),
-    'm2.4xlarge': InstanceTypeConfig(node_mem_gb=56.0, node_vcores=8),
-    'm3.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
-    'm3.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
-    'm3.2xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=8),
-    'm4.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
-    'm4.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
-    'm4.2xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=8),
-    'm4.4xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=16),
-    'm4.10xlarge': InstanceTypeConfig(node_mem_gb=120.0, node_vcores=40),
-    'm4.16xlarge': InstanceTypeConfig(node_mem_gb=240.0, node_vcores=64),
-    'r3.large': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=2),
-    'r3.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
-    'r3.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
-    'r3.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
-    'r3.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
-    'r4.large': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=2),
-    'r4.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
-    'r4.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
-    'r4.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
-    'r4.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
-    'r4.16xlarge': InstanceTypeConfig(node_mem_gb=384.0, node_vcores=64),
-    'cr1.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
-    'x1.16xlarge': InstanceTypeConfig(node_mem_gb=800.0, node_vcores=64),
-    'x1.32xlarge': InstanceTypeConfig(node_mem_gb=1600.0, node_vcores=128),
-    'd2.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
-    'd2.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
-    'd2.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
-    'd2.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=36),
-    'hs1.8xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
-}
+# built on first use, since the rounding in InstanceTypeConfig needs ANSIBLE_GLOBAL_VARS
+INSTANCE_TYPE_DEFAULTS = LazyDict(lambda: {
+        't2.medium': InstanceTypeConfig(node_mem_gb=3.0, node_vcores=2),
+        't2.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
+        't2.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
+        't2.2xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=8),
+        'c1.medium': InstanceTypeConfig(node_mem_gb=1.2, node_vcores=2),
+        'c1.xlarge': InstanceTypeConfig(node_mem_gb=5.5, node_vcores=8),
+        'c3.large': InstanceTypeConfig(node_mem_gb=3.0, node_vcores=2),
+        'c3.xlarge': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=4),
+        'c3.2xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=8),
+        'c3.4xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=16),
+        'c3.8xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=32),
+        'c4.large': InstanceTypeConfig(node_mem_gb=3.0, node_vcores=2),
+        'c4.xlarge': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=4),
+        'c4.2xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=8),
+        'c4.4xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=16),
+        'c4.8xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=36),
+        'cc2.8xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=32),
+        'i2.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
+        'i2.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
+        'i2.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
+        'i2.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
+        'hi1.4xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=16),
+        'm1.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
+        'm1.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
+        'm2.xlarge': InstanceTypeConfig(node_mem_gb=14.0, node_vcores=2),
+        'm2.2xlarge': InstanceTypeConfig(node_mem_gb=28.0, node_vcores=4),
+        'm2.4xlarge': InstanceTypeConfig(node_mem_gb=56.0, node_vcores=8),
+        'm3.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
+        'm3.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
+        'm3.2xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=8),
+        'm4.large': InstanceTypeConfig(node_mem_gb=6.0, node_vcores=2),
+        'm4.xlarge': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=4),
+        'm4.2xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=8),
+        'm4.4xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=16),
+        'm4.10xlarge': InstanceTypeConfig(node_mem_gb=120.0, node_vcores=40),
+        'm4.16xlarge': InstanceTypeConfig(node_mem_gb=240.0, node_vcores=64),
+        'r3.large': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=2),
+        'r3.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
+        'r3.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
+        'r3.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
+        'r3.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
+        'r4.large': InstanceTypeConfig(node_mem_gb=12.0, node_vcores=2),
+        'r4.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
+        'r4.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
+        'r4.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
+        'r4.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
+        'r4.16xlarge': InstanceTypeConfig(node_mem_gb=384.0, node_vcores=64),
+        'cr1.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=32),
+        'x1.16xlarge': InstanceTypeConfig(node_mem_gb=800.0, node_vcores=64),
+        'x1.32xlarge': InstanceTypeConfig(node_mem_gb=1600.0, node_vcores=128),
+        'd2.xlarge': InstanceTypeConfig(node_mem_gb=24.0, node_vcores=4),
+        'd2.2xlarge': InstanceTypeConfig(node_mem_gb=48.0, node_vcores=8),
+        'd2.4xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
+        'd2.8xlarge': InstanceTypeConfig(node_mem_gb=192.0, node_vcores=36),
+        'hs1.8xlarge': InstanceTypeConfig(node_mem_gb=96.0, node_vcores=16),
+})
+
+# Postgres gets the memory left outside node_mem_gb, which the instance types above size at
+# about a quarter of node_mem_gb (the rest of physical memory goes to the OS)
+POSTGRES_MEM_FRACTION = 0.25
+# connections each Myria worker may hold to its database, one per concurrently running query fragment
+POSTGRES_CONNECTIONS_PER_WORKER = 20
+# connections for administration (psql, Ansible), on top of the workers' (includes superuser_reserved_connections)
+POSTGRES_ADMIN_CONNECTIONS = 10
+# bulk-load mode reverts on its own after this many hours unless switched off earlier
+BULK_LOAD_REVERT_HOURS_DEFAULT = 12
+# UTC time at which bulk-load mode reverts, as stored in the cluster metadata
+BULK_LOAD_EXPIRES_FORMAT = "%Y-%m-%dT%H:%MZ"
+
+
+def get_postgres_profile(node_mem_gb, workers_per_node, worker_vcores):
+    """Returns Postgres settings sized for a node, keyed like CLUSTER_METADATA_KEYS.
+
+    Half of the Postgres memory goes to shared_buffers. The other half is split among the sorts
+    and hashes that the workers' vcores can run at once, and is page cache the rest of the time.
+    """
+    postgres_mem_mb = int(node_mem_gb * 1024 * POSTGRES_MEM_FRACTION)
+    shared_buffers_mb = max(128, postgres_mem_mb // 2)
+    free_mem_mb = max(0, postgres_mem_mb - shared_buffers_mb)
+    # allow for two sorts or hashes in each query running on a worker vcore
+    work_mem_mb = free_mem_mb // (2 * workers_per_node * worker_vcores)
+    # index builds and vacuums run at most once per worker database at a time
+    maintenance_work_mem_mb = free_mem_mb // workers_per_node
+    return dict(
+        postgres_shared_buffers_mb=shared_buffers_mb,
+        postgres_effective_cache_size_mb=max(postgres_mem_mb, shared_buffers_mb),
+        postgres_work_mem_mb=min(2048, max(4, work_mem_mb)),
+        postgres_maintenance_work_mem_mb=min(2048, max(64, maintenance_work_mem_mb)),
+        # more WAL (in 16MB segments) between checkpoints for larger buffers, up to a few GB of the data volume
+        postgres_checkpoint_segments=min(128, max(16, shared_buffers_mb // 64)),
+        postgres_wal_buffers_mb=min(16, shared_buffers_mb // 32),
+        postgres_max_connections=workers_per_node * POSTGRES_CONNECTIONS_PER_WORKER + POSTGRES_ADMIN_CONNECTIONS,
+    )
+
+
+def get_postgres_mode(md):
+    """Returns 'bulk-load' if the cluster was switched into bulk-load mode and it hasn't reverted yet, else 'normal'."""
+    if md.get('postgres_mode') == 'bulk-load' and \
+       md.get('postgres_bulk_load_expires') > datetime.utcnow().strftime(BULK_LOAD_EXPIRES_FORMAT):
+        return 'bulk-load'
+    return 'normal'
 
 
 SecurityGroupRule = namedtuple("SecurityGroupRule", ["ip_protocol", "from_port", "to_port", "cidr_ip", "src_group"])
-ssh_port = 22
-http_port = 80
-https_port = 443
-myria_rest_port = ANSIBLE_GLOBAL_VARS['myria_rest_port']
-myria_web_port = ANSIBLE_GLOBAL_VARS['myria_web_port']
-ganglia_web_port = ANSIBLE_GLOBAL_VARS['ganglia_web_port']
-jupyter_web_port = ANSIBLE_GLOBAL_VARS['jupyter_web_port']
-resourcemanager_web_port = ANSIBLE_GLOBAL_VARS['resourcemanager_web_port']
-nodemanager_web_port = ANSIBLE_GLOBAL_VARS['nodemanager_web_port']
-SECURITY_GROUP_RULES = [
-    SecurityGroupRule("tcp", ssh_port, ssh_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", http_port, http_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", https_port, https_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", myria_rest_port, myria_rest_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", myria_web_port, myria_web_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", ganglia_web_port, ganglia_web_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", jupyter_web_port, jupyter_web_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", resourcemanager_web_port, resourcemanager_web_port, "0.0.0.0/0", None),
-    SecurityGroupRule("tcp", nodemanager_web_port, nodemanager_web_port, "0.0.0.0/0", None),
-]
+
+
+def get_security_group_rules():
+    ssh_port = 22
+    http_port = 80
+    https_port = 443
+    myria_rest_port = ANSIBLE_GLOBAL_VARS['myria_rest_port']
+    myria_web_port = ANSIBLE_GLOBAL_VARS['myria_web_port']
+    ganglia_web_port = ANSIBLE_GLOBAL_VARS['ganglia_web_port']
+    jupyter_web_port = ANSIBLE_GLOBAL_VARS['jupyter_web_port']
+    resourcemanager_web_port = ANSIBLE_GLOBAL_VARS['resourcemanager_web_port']
+    nodemanager_web_port = ANSIBLE_GLOBAL_VARS['nodemanager_web_port']
+    return [
+        SecurityGroupRule("tcp", ssh_port, ssh_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", http_port, http_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", https_port, https_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", myria_rest_port, myria_rest_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", myria_web_port, myria_web_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", ganglia_web_port, ganglia_web_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", jupyter_web_port, jupyter_web_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", resourcemanager_web_port, resourcemanager_web_port, "0.0.0.0/0", None),
+        SecurityGroupRule("tcp", nodemanager_web_port, nodemanager_web_port, "0.0.0.0/0", None),
+    ]
 
 
 CLUSTER_METADATA_KEYS = dict(
@@ -431,6 +532,7 @@ CLUSTER_METADATA_KEYS = dict(
     data_volume_type=str,
     data_volume_iops=int,
     data_volume_count=int,
+    volume_layout=str,
     node_mem_gb=float,
     driver_mem_gb=float,
     coordinator_mem_gb=float,
@@ -443,6 +545,15 @@ CLUSTER_METADATA_KEYS = dict(
     cluster_log_level=str,
     state=str,
     iam_user=str,
+    postgres_shared_buffers_mb=int,
+    postgres_effective_cache_size_mb=int,
+    postgres_work_mem_mb=int,
+    postgres_maintenance_work_mem_mb=int,
+    postgres_checkpoint_segments=int,
+    postgres_wal_buffers_mb=int,
+    postgres_max_connections=int,
+    postgres_mode=str,
+    postgres_bulk_load_expires=str,
 )
 
 
@@ -462,12 +573,534 @@ class MyriaError(Exception):
     pass
 
 
+# Number of AWS API requests issued by this process, keyed by API action (e.g. "DescribeInstances")
+AWS_REQUEST_COUNTS = Counter()
+# boto connections are reused for the lifetime of the process, keyed by (service, region, profile)
+AWS_CONNECTIONS = {}
+# connections are shared between threads working on different regions (but never used concurrently)
+AWS_CONNECTIONS_LOCK = threading.Lock()
+
+
+def get_aws_connection(service, region, profile=None):
+    key = (service.__name__, region, profile)
+    with AWS_CONNECTIONS_LOCK:
+        conn = AWS_CONNECTIONS.get(key)
+        if conn is None:
+            conn = service.connect_to_region(region, profile_name=profile)
+            if conn is None:
+                return None
+            # count every round trip, including those issued implicitly by boto objects (e.g. `group.instances()`)
+            make_request = conn.make_request
+            def counting_make_request(action, *args, **kwargs):
+                with AWS_CONNECTIONS_LOCK:
+                    AWS_REQUEST_COUNTS[action] += 1
+                return make_request(action, *args, **kwargs)
+            conn.make_request = counting_make_request
+            AWS_CONNECTIONS[key] = conn
+    return conn
+
+
+def get_ec2_connection(region, profile=None):
+    import boto.ec2
+    return get_aws_connection(boto.ec2, region, profile=profile)
+
+
+def get_vpc_connection(region, profile=None):
+    import boto.vpc
+    return get_aws_connection(boto.vpc, region, profile=profile)
+
+
+def get_iam_connection(region, profile=None):
+    import boto.iam
+    return get_aws_connection(boto.iam, region, profile=profile)
+
+
+def echo_aws_request_counts():
+    total = sum(AWS_REQUEST_COUNTS.values())
+    click.secho("AWS API requests issued: %d" % total, fg='yellow', err=True)
+    for action, count in sorted(AWS_REQUEST_COUNTS.iteritems(), key=itemgetter(1), reverse=True):
+        click.secho("  %-40s %d" % (action, count), fg='yellow', err=True)
+
+
+# local cache of cluster topology, used by read-only commands (login, describe, exec, logs)
+CLUSTER_CACHE_DIR = os.path.join(HOME, ".myria", "clusters")
+CLUSTER_CACHE_TTL_SECS = 6 * 60 * 60
+
+# stand-ins for boto objects restored from the cluster cache, with just the attributes we use
+CachedGroup = namedtuple('CachedGroup', ['id', 'name', 'vpc_id', 'tags'])
+CachedInstance = namedtuple('CachedInstance', ['id', 'state', 'tags', 'public_dns_name', 'private_dns_name',
+                                               'ip_address', 'private_ip_address'])
+
+
+class ClusterContext(object):
+    """Memoized view of the security group, instances and tags of a single cluster.
+
+    Lookups are issued at most once until invalidate() is called, so any code that
+    launches, terminates, starts, stops or retags instances (or creates or deletes
+    the security group) must invalidate the context afterward. Invalidating also
+    discards the on-disk topology cache, which is rewritten by save_cache() once
+    the cluster is in a stable state.
+    """
+    def __init__(self, cluster_name, region, profile=None, vpc_id=None):
+        self.cluster_name = cluster_name
+        self.region = region
+        self.profile = profile
+        self.vpc_id = vpc_id
+        self._group = None
+        self._group_loaded = False
+        self._instances = None
+        self._metadata = None
+
+    @property
+    def ec2(self):
+        return get_ec2_connection(self.region, profile=self.profile)
+
+    def group(self):
+        if not self._group_loaded:
+            self._group = self._lookup_group()
+            self._group_loaded = True
+        return self._group
+
+    def _lookup_group(self):
+        ec2 = self.ec2
+        groups = []
+        if self.vpc_id:
+            # In the EC2 API, filters can only express OR,
+            # so we have to implement AND by intersecting results for each filter.
+            groups_in_vpc = ec2.get_all_security_groups(filters={'vpc-id': self.vpc_id})
+            groups = [g for g in groups_in_vpc if g.name == self.cluster_name]
+        else:
+            try:
+                groups = ec2.get_all_security_groups(groupnames=self.cluster_name)
+            except ec2.ResponseError as e:
+                if e.code == 'InvalidGroup.NotFound':
+                    return None
+                else:
+                    raise
+        if not groups:
+            return None
+        else:
+            return groups[0]
+
+    def instances(self):
+        if self._instances is None:
+            group = self.group()
+            self._instances = group.instances() if group else []
+        return self._instances
+
+    def tags(self):
+        group = self.group()
+        return group.tags if group else {}
+
+    def metadata(self):
+        if self._metadata is None and self.group():
+            self._metadata = get_dict_from_cluster_metadata(self.group())
+        return self._metadata
+
+    def instances_with_role(self, role):
+        return [i for i in self.instances() if i.tags.get('cluster-role') == role]
+
+    def instance_by_node_id(self, node_id):
+        for instance in self.instances():
+            if int(instance.tags.get('node-id')) == node_id:
+                return instance
+        return None
+
+    def invalidate(self, group=True, instances=True):
+        if group:
+            self._group = None
+            self._group_loaded = False
+            self._metadata = None
+        if instances:
+            self._instances = None
+        self.delete_cache()
+
+    @property
+    def cache_path(self):
+        return os.path.join(CLUSTER_CACHE_DIR, "%s_%s_%s.json" % (self.profile or "default", self.region, self.cluster_name))
+
+    def load_cache(self, ttl=CLUSTER_CACHE_TTL_SECS):
+        """Restores the group and instances from the cache if it is fresh, returning True on a hit."""
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (IOError, ValueError):
+            return False
+        if time() - cached['cached_at'] > ttl:
+            return False
+        if self.vpc_id and cached['group']['vpc_id'] != self.vpc_id:
+            return False
+        self._group = CachedGroup(**cached['group'])
+        self._group_loaded = True
+        self._instances = [CachedInstance(**i) for i in cached['instances']]
+        self._metadata = cached['metadata']
+        return True
+
+    def save_cache(self):
+        group = self.group()
+        if not group:
+            self.delete_cache()
+            return
+        cached = dict(
+            cached_at=time(),
+            group=CachedGroup(group.id, group.name, group.vpc_id, dict(group.tags))._asdict(),
+            instances=[CachedInstance(i.id, i.state, dict(i.tags), i.public_dns_name, i.private_dns_name,
+                                      i.ip_address, i.private_ip_address)._asdict() for i in self.instances()],
+            metadata=self.metadata())
+        if not os.path.exists(CLUSTER_CACHE_DIR):
+            os.makedirs(CLUSTER_CACHE_DIR)
+        write_secure_file(self.cache_path, json.dumps(cached, sort_keys=True, indent=4, separators=(',', ': ')))
+
+    def delete_cache(self):
+        try:
+            os.remove(self.cache_path)
+        except OSError:
+            pass
+
+
+CLUSTER_CONTEXTS = {}
+
+
+def imap_regions(func, args):
+    """Calls `func(arg)` for each (per-region) arg on its own thread, yielding results as they complete."""
+    from multiprocessing import TimeoutError
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(max(1, len(args)))
+    try:
+        results = pool.imap_unordered(func, args)
+        while True:
+            try:
+                # wait with a timeout so the main thread still sees KeyboardInterrupt
+                yield results.next(1)
+            except TimeoutError:
+                continue
+            except StopIteration:
+                return
+    finally:
+        pool.terminate()
+
+
+def get_cached_cluster_context(cluster_name, region, profile=None, vpc_id=None, refresh=False):
+    """Like get_cluster_context(), but served from the local topology cache when it is fresh."""
+    cluster = get_cluster_context(cluster_name, region, profile=profile, vpc_id=vpc_id)
+    if refresh or not cluster.load_cache():
+        cluster.save_cache()
+    return cluster
+
+
+def get_cluster_context(cluster_name, region, profile=None, vpc_id=None):
+    key = (cluster_name, region, profile, vpc_id)
+    if key not in CLUSTER_CONTEXTS:
+        CLUSTER_CONTEXTS[key] = ClusterContext(cluster_name, region, profile=profile, vpc_id=vpc_id)
+    return CLUSTER_CONTEXTS[key]
+
+
+# Chrome/Perfetto traces of lifecycle commands are written here
+TRACE_DIR = os.path.join(HOME, ".myria", "traces")
+# process IDs used in traces for our own phases and for Ansible tasks on each host
+TRACE_CLI_PID = 1
+TRACE_ANSIBLE_PID = 2
+# environment variable telling the myria_timings callback plugin where to write task timings
+TASK_TIMINGS_FILE_ENV_VAR = "MYRIA_TASK_TIMINGS_FILE"
+# environment variable telling the myria_checkpoint strategy plugin which tasks to skip on each host
+CHECKPOINT_FILE_ENV_VAR = "MYRIA_CHECKPOINT_FILE"
+# task statuses reported by the myria_timings callback plugin that need not be repeated on retry
+CHECKPOINT_TASK_STATUSES = frozenset(['ok', 'changed', 'ignored'])
+# one line per traced command, with per-phase and per-task timings, for finding regressions across releases
+TIMINGS_HISTORY_FILE = os.path.join(HOME, ".myria", "timings", "history.jsonl")
+TIMINGS_REPORT_TOP_DEFAULT = 15
+# tasks this much slower than their baseline are flagged in timing reports
+TIMINGS_REGRESSION_FACTOR = 1.25
+TIMINGS_REGRESSION_MIN_SECS = 5
+
+
+def load_task_timings(path):
+    """Returns the records written by the myria_timings callback plugin to `path`, and removes it."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        task_timings = [json.loads(line) for line in f]
+    os.remove(path)
+    return task_timings
+
+
+class Tracer(object):
+    """Records timed spans as Chrome trace events ("complete" events, in microseconds).
+
+    Spans from our own code go on a thread per Python thread; Ansible task spans
+    reported by the myria_timings callback plugin go on a thread per host.
+    """
+    def __init__(self):
+        self.start = time()
+        self.events = []
+        self.task_timings = []
+        self.tids = {}
+        self.lock = threading.Lock()
+        self.command = None
+        self.cluster_name = None
+
+    def _tid(self, pid, thread_name):
+        key = (pid, thread_name)
+        if key not in self.tids:
+            self.tids[key] = len(self.tids) + 1
+            self.events.append(dict(name="thread_name", ph="M", pid=pid, tid=self.tids[key], args=dict(name=thread_name)))
+        return self.tids[key]
+
+    def add(self, name, start, duration, category="phase", pid=TRACE_CLI_PID, thread_name=None, args=None):
+        if thread_name is None:
+            thread_name = threading.current_thread().name
+        with self.lock:
+            self.events.append(dict(name=name, cat=category, ph="X", pid=pid, tid=self._tid(pid, thread_name),
+                                    ts=int((start - self.start) * 1e6), dur=int(duration * 1e6), args=args or {}))
+
+    @contextmanager
+    def span(self, name, category="phase", **args):
+        start = time()
+        try:
+            yield
+        finally:
+            self.add(name, start, time() - start, category=category, args=args)
+
+    def add_task_timings(self, task_timings):
+        """Adds a span for each task/host reported by the myria_timings callback plugin."""
+        for t in task_timings:
+            self.task_timings.append(t)
+            self.add(t['task'], t['start'], t['end'] - t['start'], category="task", pid=TRACE_ANSIBLE_PID,
+                     thread_name=t['host'], args=dict(play=t['play'], role=t['role'], status=t['status']))
+
+    def phase_totals(self):
+        """Returns (name, count, total seconds) of our own spans, in order of first occurrence."""
+        totals = {}
+        order = []
+        for e in self.events:
+            if e['ph'] != "X" or e['pid'] != TRACE_CLI_PID:
+                continue
+            if e['name'] not in totals:
+                totals[e['name']] = [0, 0]
+                order.append(e['name'])
+            totals[e['name']][0] += 1
+            totals[e['name']][1] += e['dur'] / 1e6
+        return [(name, totals[name][0], totals[name][1]) for name in order]
+
+    def task_totals(self):
+        """Returns {task: (hosts, total seconds over all hosts, seconds on the slowest host)}.
+
+        Tasks are named "role : task" as in Ansible's output; time spent on a task by the same
+        host in several plays or playbook attempts is added up.
+        """
+        host_secs = {}
+        for t in self.task_timings:
+            task = "%s : %s" % (t['role'], t['task']) if t['role'] else t['task']
+            secs = host_secs.setdefault(task, {})
+            secs[t['host']] = secs.get(t['host'], 0) + t['end'] - t['start']
+        return dict((task, (len(secs), sum(secs.values()), max(secs.values())))
+                    for task, secs in host_secs.iteritems())
+
+    def write(self):
+        if not os.path.exists(TRACE_DIR):
+            os.makedirs(TRACE_DIR)
+        path = os.path.join(TRACE_DIR, "%s-%s-%s.json" % (
+            self.cluster_name, self.command, datetime.fromtimestamp(self.start).strftime("%Y%m%d-%H%M%S")))
+        events = [dict(name="process_name", ph="M", pid=TRACE_CLI_PID, args=dict(name=SCRIPT_NAME)),
+                  dict(name="process_name", ph="M", pid=TRACE_ANSIBLE_PID, args=dict(name="ansible"))] + self.events
+        with open(path, 'w') as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit="ms",
+                           otherData=dict(command=self.command, cluster_name=self.cluster_name,
+                                          started=datetime.fromtimestamp(self.start).isoformat())), f)
+        return path
+
+    def echo_summary(self):
+        wall_secs = time() - self.start
+        format_str = "{: <40} {: >5} {: >10} {: >7}"
+        click.echo()
+        click.echo(format_str.format('PHASE', 'COUNT', 'SECONDS', '% WALL'))
+        click.echo(format_str.format('-----', '-----', '-------', '------'))
+        for name, count, total_secs in self.phase_totals():
+            click.echo(format_str.format(name[:40], count, "%.1f" % total_secs, "%.1f" % (100 * total_secs / wall_secs)))
+        click.echo(format_str.format('(total wall time)', '', "%.1f" % wall_secs, ''))
+
+    def history_record(self):
+        return dict(version=get_cli_version(), command=self.command, cluster_name=self.cluster_name,
+                    started=datetime.fromtimestamp(self.start).isoformat(), wall_secs=time() - self.start,
+                    phases=dict((name, total_secs) for name, _, total_secs in self.phase_totals()),
+                    tasks=dict((task, max_secs) for task, (_, _, max_secs) in self.task_totals().iteritems()))
+
+
+TRACER = Tracer()
+
+
+def begin_trace(command, cluster_name, timings=False):
+    """Writes the trace of this command (and optionally prints a timing summary) when the process exits."""
+    TRACER.command = command
+    TRACER.cluster_name = cluster_name
+
+    def finish_trace():
+        # read the history before adding this run, so the baseline only covers earlier runs
+        history = load_timings_history(command)
+        record = TRACER.history_record()
+        try:
+            path = TRACER.write()
+            if record['tasks']:
+                append_timings_history(record)
+        except (IOError, OSError) as e:
+            click.secho("Failed to write timing trace: %s" % e, fg='red')
+            return
+        if timings:
+            TRACER.echo_summary()
+            if record['tasks']:
+                baseline_version, baseline = timings_baseline(history, record['version'])
+                echo_task_report([(task, hosts, max_secs, total_secs) for task, (hosts, total_secs, max_secs)
+                                  in TRACER.task_totals().iteritems()], baseline, baseline_version)
+                click.echo("(SECS: time on the slowest host)")
+            click.echo("Timing trace written to %s (open in chrome://tracing or ui.perfetto.dev)" % path)
+    atexit.register(finish_trace)
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2.0
+
+
+def load_timings_history(command=None):
+    """Returns the recorded runs of `command` (or of all commands), oldest first."""
+    if not os.path.exists(TIMINGS_HISTORY_FILE):
+        return []
+    history = []
+    with open(TIMINGS_HISTORY_FILE) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # ignore a line truncated by an interrupted write
+                continue
+            if command is None or record['command'] == command:
+                history.append(record)
+    return history
+
+
+def append_timings_history(record):
+    history_dir = os.path.dirname(TIMINGS_HISTORY_FILE)
+    if not os.path.exists(history_dir):
+        os.makedirs(history_dir)
+    with open(TIMINGS_HISTORY_FILE, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def timings_baseline(history, version):
+    """Returns (baseline version, {task: median seconds}) from the runs of the latest release before `version`.
+
+    Falls back to earlier runs of `version` itself if no other release has been recorded.
+    """
+    versions = [r['version'] for r in history]
+    baseline_version = next((v for v in reversed(versions) if v != version), version if version in versions else None)
+    task_secs = {}
+    for record in history:
+        if record['version'] == baseline_version:
+            for task, secs in record['tasks'].iteritems():
+                task_secs.setdefault(task, []).append(secs)
+    return baseline_version, dict((task, median(secs)) for task, secs in task_secs.iteritems())
+
+
+def echo_task_report(rows, baseline, baseline_version, top=TIMINGS_REPORT_TOP_DEFAULT, headers=('HOSTS', 'SUM_SECS')):
+    """Prints the `top` slowest tasks from `rows` of (task, count, seconds, other seconds).
+
+    `seconds` is compared to the task's baseline (and tasks that got much slower are
+    highlighted); `headers` name the count and other seconds columns.
+    """
+    format_str = "{: <60} {: >5} {: >9} {: >10} {: >9} {: >7}"
+    click.echo()
+    click.echo(format_str.format('TASK', headers[0], 'SECS', headers[1], 'BASELINE', 'CHANGE'))
+    click.echo(format_str.format('----', '-' * len(headers[0]), '----', '-' * len(headers[1]), '--------', '------'))
+    for task, count, secs, other_secs in sorted(rows, key=itemgetter(2), reverse=True)[:top]:
+        baseline_secs = baseline.get(task)
+        change = "%+.0f%%" % (100 * (secs - baseline_secs) / baseline_secs) if baseline_secs else ''
+        regressed = (baseline_secs is not None and secs >= baseline_secs * TIMINGS_REGRESSION_FACTOR and
+                     secs - baseline_secs >= TIMINGS_REGRESSION_MIN_SECS)
+        click.secho(format_str.format(task[:60], count, "%.1f" % secs, "%.1f" % other_secs,
+                                      "%.1f" % baseline_secs if baseline_secs is not None else '-', change),
+                    fg='red' if regressed else None)
+    if baseline_version:
+        click.echo("(baseline: median of recorded runs of version %s)" % baseline_version)
+
+
+def traced(name):
+    """Decorator recording a span for each call of the decorated function."""
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class WaitTimeoutError(Exception):
+    pass
+
+
+# CreateTags accepts at most this many resource IDs per call
+CREATE_TAGS_MAX_RESOURCES = 1000
+
+# Maximum number of seconds each phase may wait for its condition to hold
+WAIT_DEADLINES = dict(
+    security_group_available=300,
+    spot_requests_fulfilled=3600,
+    instances_reachable=1800,
+    instances_stopped=1200,
+    workers_online=1800,
+    image_available=7200,
+    image_copies=7200,
+)
+# Polling interval starts at WAIT_INITIAL_DELAY_SECS and backs off exponentially to WAIT_MAX_DELAY_SECS
+WAIT_INITIAL_DELAY_SECS = 2.0
+WAIT_MAX_DELAY_SECS = 30.0
+WAIT_BACKOFF_FACTOR = 1.5
+# Timeout of each request to the Myria REST API while polling it, so a hung coordinator costs one poll
+MYRIA_REST_TIMEOUT_SECS = 5
+
+
+def wait_until(condition, phase, deadline=None, initial_delay=WAIT_INITIAL_DELAY_SECS,
+               max_delay=WAIT_MAX_DELAY_SECS, verbosity=0):
+    """Poll `condition` until it holds and return the number of seconds waited.
+
+    `condition` is a callable returning a (done, progress) pair, where `progress` is a
+    short status message (or None). Polls back off exponentially with jitter, and
+    WaitTimeoutError is raised if `phase` has not completed by its deadline.
+    """
+    if deadline is None:
+        deadline = WAIT_DEADLINES[phase]
+    description = phase.replace('_', ' ')
+    start = time()
+    delay = initial_delay
+    last_progress = None
+    while True:
+        done, progress = condition()
+        elapsed = time() - start
+        if done:
+            TRACER.add("wait for %s" % description, start, elapsed, category="wait")
+            if verbosity > 0:
+                click.secho("Waited %.1f seconds for %s" % (elapsed, description), fg='green')
+            return elapsed
+        if elapsed >= deadline:
+            raise WaitTimeoutError("Timed out after %d seconds waiting for %s%s" % (
+                elapsed, description, (" (%s)" % progress) if progress else ""))
+        # "equal jitter": sleep at least half the current delay so polls stay spread out
+        sleep_secs = min(delay / 2 + random.uniform(0, delay / 2), deadline - elapsed)
+        if verbosity > 0 and progress and (progress != last_progress or verbosity > 1):
+            click.secho("%s, checking again in %.0f seconds..." % (progress, sleep_secs), fg='yellow')
+        last_progress = progress
+        sleep(sleep_secs)
+        delay = min(delay * WAIT_BACKOFF_FACTOR, max_delay)
+
+
+@traced("create key pair")
 def create_key_pair_and_private_key_file(key_pair, private_key_file, region, profile=None, verbosity=0):
     # First, check if private key file exists and is readable
     if verbosity > 0:
         click.echo("Checking for existence/readability of private key file '%s'..." % private_key_file)
     private_key_exists = (os.path.isfile(private_key_file) and os.access(private_key_file, os.R_OK))
-    ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
+    ec2 = get_ec2_connection(region, profile=profile)
     try:
         if verbosity > 0:
             click.echo("Checking for existence of key pair '%s'..." % key_pair)
@@ -508,17 +1141,57 @@ def write_secure_file(path, content):
     mode = stat.S_IRUSR | stat.S_IWUSR  # This is 0o600 in octal and 384 in decimal.
     umask_original = os.umask(0)
     try:
-        handle = os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT, mode), 'w')
+        handle = os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), 'w')
     finally:
         os.umask(umask_original)
     handle.write(content)
     handle.close()
 
 
-def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
-    group = get_security_group_for_cluster(cluster_name, region=kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+def get_instance_volume_ids(ec2, instances):
+    """Returns the IDs of the EBS volumes attached to `instances`.
+
+    They are read from the instances' block device mappings, which launch responses usually
+    don't fill in yet, so any instances without them are looked up in a single DescribeVolumes call.
+    """
+    volume_ids = []
+    unmapped_instance_ids = []
+    for instance in instances:
+        mapped_volume_ids = [bdt.volume_id for bdt in (instance.block_device_mapping or {}).values() if bdt.volume_id]
+        volume_ids.extend(mapped_volume_ids)
+        if not mapped_volume_ids:
+            unmapped_instance_ids.append(instance.id)
+    if unmapped_instance_ids:
+        volume_ids.extend(v.id for v in ec2.get_all_volumes(filters={'attachment.instance-id': unmapped_instance_ids}))
+    return volume_ids
+
+
+def create_tags_in_bulk(ec2, tags_by_resource):
+    """Applies {resource ID: {tag: value}} with as few CreateTags calls as we can.
+
+    Each call applies the same tags to all of its resources, so we group the tags applied to
+    exactly the same resources: tags shared by the whole cluster take one call, and only tags
+    unique to a resource (like an instance's `Name`) take a call per resource.
+    """
+    resource_ids_by_tag = {}
+    for resource_id, tags in tags_by_resource.iteritems():
+        for tag in tags.iteritems():
+            resource_ids_by_tag.setdefault(tag, set()).add(resource_id)
+    tags_by_resource_ids = {}
+    for tag, resource_ids in resource_ids_by_tag.iteritems():
+        tags_by_resource_ids.setdefault(frozenset(resource_ids), {}).update([tag])
+    for resource_ids, tags in tags_by_resource_ids.iteritems():
+        resource_ids = sorted(resource_ids)
+        for i in xrange(0, len(resource_ids), CREATE_TAGS_MAX_RESOURCES):
+            ec2.create_tags(resource_ids[i:i + CREATE_TAGS_MAX_RESOURCES], tags)
+
+
+@traced("launch instances")
+def launch_cluster(cluster_name, app_name="myria", on_reachable=None, on_error=None, verbosity=0, **kwargs):
+    cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+    group = cluster.group()
     target_cluster_size = kwargs['cluster_size']
-    actual_cluster_size = len(group.instances())
+    actual_cluster_size = len(cluster.instances())
     launch_count = 0
     state = group.tags['state']
     if state == "initializing":
@@ -534,7 +1207,7 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
     # Launch instances
     if verbosity > 0:
         click.echo("Launching instances...")
-    ec2 = boto.ec2.connect_to_region(kwargs['region'], profile_name=kwargs['profile'])
+    ec2 = get_ec2_connection(kwargs['region'], profile=kwargs['profile'])
     launch_args=dict(image_id=kwargs['ami_id'],
                      key_name=kwargs['key_pair'],
                      security_group_ids=[group.id],
@@ -544,6 +1217,7 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
                      instance_profile_name=kwargs.get('role'),
                      ebs_optimized=(kwargs.get('storage_type') == 'ebs') and (kwargs['instance_type'] in EBS_OPTIMIZED_INSTANCE_TYPES))
     if kwargs.get('subnet_id'):
+        from boto.ec2.networkinterface import NetworkInterfaceSpecification, NetworkInterfaceCollection
         interface = NetworkInterfaceSpecification(subnet_id=kwargs['subnet_id'],
                                                   groups=[group.id],
                                                   associate_public_ip_address=True)
@@ -558,28 +1232,21 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
                            availability_zone_group="az-launch-group-%s" % cluster_name) # launch all instances in same AZ
         spot_requests = ec2.request_spot_instances(**launch_args)
         spot_request_ids = [req.id for req in spot_requests]
-        try:
-            while True:
-                # Spot request objects won't auto-update, so we need to fetch them again on each iteration.
-                try:
-                    reqs = ec2.get_all_spot_instance_requests(request_ids=spot_request_ids)
-                except ec2.ResponseError as e:
-                    # Occasionally EC2 will not recognize a spot request ID it has just returned.
-                    if e.code == 'InvalidSpotInstanceRequestID.NotFound':
-                        pass
-                    else:
-                        raise
+        def spot_requests_fulfilled():
+            # Spot request objects won't auto-update, so we need to fetch them again on each poll.
+            try:
+                reqs = ec2.get_all_spot_instance_requests(request_ids=spot_request_ids)
+            except ec2.ResponseError as e:
+                # Occasionally EC2 will not recognize a spot request ID it has just returned.
+                if e.code == 'InvalidSpotInstanceRequestID.NotFound':
+                    return False, None
                 else:
-                    for req in reqs:
-                        if req.state == "active":
-                            launched_instance_ids.append(req.instance_id)
-                    if len(launched_instance_ids) == len(reqs):
-                        # all requests fulfilled, so break out of while loop
-                        break
-                if verbosity > 0:
-                    click.secho("Not all spot requests fulfilled (%d/%d), waiting 60 seconds..." % (
-                        len(launched_instance_ids), len(spot_request_ids)), fg='yellow')
-                sleep(60)
+                    raise
+            launched_instance_ids[:] = [req.instance_id for req in reqs if req.state == "active"]
+            return (len(launched_instance_ids) == len(reqs),
+                    "Not all spot requests fulfilled (%d/%d)" % (len(launched_instance_ids), len(spot_request_ids)))
+        try:
+            wait_until(spot_requests_fulfilled, 'spot_requests_fulfilled', verbosity=verbosity)
             launched_instances = ec2.get_only_instances(launched_instance_ids)
         except:
             if verbosity > 0:
@@ -593,8 +1260,10 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
             raise
     else:
         launch_args.update(min_count=launch_count, max_count=launch_count)
-        reservation = ec2.run_instances(**launch_args)
+        with TRACER.span("run instances"):
+            reservation = ec2.run_instances(**launch_args)
         launched_instances = reservation.instances
+    cluster.invalidate(group=False)
     try:
         instance_ids = [i.id for i in launched_instances]
         # Tag instances
@@ -603,19 +1272,15 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
         # We need to sort instances in a stable order that increases with time,
         # so worker IDs are stable and increase when new instances are launched.
         instances = sorted(launched_instances, key=attrgetter('ami_launch_index'))
+        tagging_start = time()
+        common_tags = {'app': app_name, 'cluster-name': cluster_name}
+        if kwargs.get('iam_user'):
+            common_tags.update({'user:Name': kwargs['iam_user']})
+        tags_by_resource = {}
         for idx, instance in enumerate(instances):
-            instance_tags = {'app': app_name, 'cluster-name': cluster_name}
-            if kwargs.get('iam_user'):
-                instance_tags.update({'user:Name': kwargs['iam_user']})
+            instance_tags = dict(common_tags)
             if kwargs.get('spot_price'):
                 instance_tags.update({'spot-price': kwargs['spot_price']})
-            # Tag volumes
-            volumes = ec2.get_all_volumes(filters={'attachment.instance-id': instance.id})
-            for volume in volumes:
-                volume_tags = {'app': app_name, 'cluster-name': cluster_name}
-                if kwargs.get('iam_user'):
-                    volume_tags.update({'user:Name': kwargs['iam_user']})
-                volume.add_tags(volume_tags)
             cluster_idx = current_cluster_size + idx
             # HACK: we zero-pad the `node-id` tag so we can alphabetically sort on it in Ansible (numeric sort is too difficult).
             instance_tags.update({'node-id': "%03d" % cluster_idx})
@@ -627,19 +1292,29 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
                 instance_name_tag = "%s-worker-%d-%d" % (cluster_name, ((cluster_idx - 1) * kwargs['workers_per_node']) + 1, cluster_idx * kwargs['workers_per_node'])
                 worker_id_tag = ','.join(map(str, range(((cluster_idx - 1) * kwargs['workers_per_node']) + 1, (cluster_idx  * kwargs['workers_per_node']) + 1)))
                 instance_tags.update({'Name': instance_name_tag, 'cluster-role': "worker", 'worker-id': worker_id_tag})
-            instance.add_tags(instance_tags)
+            tags_by_resource[instance.id] = instance_tags
+            instance.tags.update(instance_tags)
+        # Tag volumes
+        for volume_id in get_instance_volume_ids(ec2, instances):
+            tags_by_resource[volume_id] = common_tags
+        create_tags_in_bulk(ec2, tags_by_resource)
+        TRACER.add("tag instances", tagging_start, time() - tagging_start)
+        cluster.invalidate(group=False)
         # poll instances for status until all are reachable
         if verbosity > 0:
             click.secho("Waiting for all instances to become reachable...", fg='yellow')
         wait_for_all_instances_reachable(
-            instance_ids, kwargs['region'], profile=kwargs['profile'], verbosity=verbosity)
+            instance_ids, kwargs['region'], profile=kwargs['profile'], on_reachable=on_reachable, verbosity=verbosity)
         # need to update instances to get public IP
         for i in instances:
             i.update()
+        cluster.invalidate(group=False)
     except:
         # If this is a new cluster, the caller is responsible for destroying it.
         if state == "resizing":
             click.secho("Unexpected error, terminating new instances...", fg='red')
+            if on_error:
+                on_error()
             if verbosity > 1:
                 click.echo("Terminating instances %s" % ', '.join(instance_ids))
             terminate_instances(kwargs['region'], instance_ids, profile=kwargs['profile'])
@@ -650,45 +1325,26 @@ def launch_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
 
 
 def get_security_group_for_cluster(cluster_name, region, profile=None, vpc_id=None):
-    ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
-    groups = []
-    if vpc_id:
-        # In the EC2 API, filters can only express OR,
-        # so we have to implement AND by intersecting results for each filter.
-        groups_in_vpc = ec2.get_all_security_groups(filters={'vpc-id': vpc_id})
-        groups = [g for g in groups_in_vpc if g.name == cluster_name]
-    else:
-        try:
-            groups = ec2.get_all_security_groups(groupnames=cluster_name)
-        except ec2.ResponseError as e:
-            if e.code == 'InvalidGroup.NotFound':
-                return None
-            else:
-                raise
-    if not groups:
-        return None
-    else:
-        return groups[0]
+    return get_cluster_context(cluster_name, region, profile=profile, vpc_id=vpc_id).group()
 
 
+@traced("create security group")
 def create_security_group_for_cluster(cluster_name, app_name="myria", verbosity=0, **kwargs):
     if verbosity > 0:
         click.echo("Creating security group '%s' in region '%s'..." % (cluster_name, kwargs['region']))
-    ec2 = boto.ec2.connect_to_region(kwargs['region'], profile_name=kwargs['profile'])
+    ec2 = get_ec2_connection(kwargs['region'], profile=kwargs['profile'])
     group = ec2.create_security_group(cluster_name, "Myria security group", vpc_id=kwargs['vpc_id'])
     # We need to poll for availability after creation since as usual AWS is eventually consistent
-    while True:
+    def security_group_available():
         try:
             ec2.get_all_security_groups(group_ids=[group.id])[0]
         except ec2.ResponseError as e:
             if e.code == 'InvalidGroup.NotFound':
-                if verbosity > 0:
-                    click.secho("Waiting for security group '%s' in region '%s' to become available..." % (cluster_name, kwargs['region']), fg='yellow')
-                sleep(5)
+                return False, "Security group '%s' in region '%s' not yet available" % (cluster_name, kwargs['region'])
             else:
                 raise
-        else:
-            break
+        return True, None
+    wait_until(security_group_available, 'security_group_available', initial_delay=1.0, verbosity=verbosity - 1)
     # Tag security group to designate as Myria cluster
     group_tags = {'app': app_name, 'state': "initializing"}
     if kwargs['iam_user']:
@@ -697,9 +1353,10 @@ def create_security_group_for_cluster(cluster_name, app_name="myria", verbosity=
     arg_tags = get_cluster_metadata_tags_from_dict(kwargs)
     group_tags.update(arg_tags)
     group.add_tags(group_tags)
+    get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id']).invalidate()
     # Allow this group complete access to itself
     self_rules = [SecurityGroupRule(proto, 0, 65535, "0.0.0.0/0", group) for proto in ['tcp', 'udp']]
-    rules = self_rules + SECURITY_GROUP_RULES
+    rules = self_rules + get_security_group_rules()
     # Add security group rules
     for rule in rules:
         group.authorize(ip_protocol=rule.ip_protocol,
@@ -711,19 +1368,22 @@ def create_security_group_for_cluster(cluster_name, app_name="myria", verbosity=
 
 
 def terminate_cluster(cluster_name, region, profile=None, vpc_id=None):
+    from boto.exception import EC2ResponseError
     # the loop is necessary to resume execution after a user interrupt
     while True:
         try:
-            group = get_security_group_for_cluster(cluster_name, region, profile=profile, vpc_id=vpc_id)
+            cluster = get_cluster_context(cluster_name, region, profile=profile, vpc_id=vpc_id)
+            group = cluster.group()
             if not group:
                 click.secho("Security group '%s' not found" % cluster_name, fg='red')
                 return
-            instance_ids = [instance.id for instance in group.instances()]
+            instance_ids = [instance.id for instance in cluster.instances()]
             # we want to allow users to delete a security group with no instances
             if instance_ids:
                 click.echo("Terminating instances %s" % ', '.join(instance_ids))
-                ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
+                ec2 = get_ec2_connection(region, profile=profile)
                 ec2.terminate_instances(instance_ids=instance_ids)
+                cluster.invalidate(group=False)
             click.echo("Deleting security group '%s' (%s)" % (group.name, group.id))
             # EC2 can take a while to update dependencies, so retry until we succeed
             while True:
@@ -736,6 +1396,7 @@ def terminate_cluster(cluster_name, region, profile=None, vpc_id=None):
                     else:
                         raise
                 else:
+                    cluster.invalidate()
                     click.secho("Security group '%s' (%s) successfully deleted" % (group.name, group.id), fg='green')
                     break
         except KeyboardInterrupt:
@@ -745,7 +1406,7 @@ def terminate_cluster(cluster_name, region, profile=None, vpc_id=None):
 
 
 def terminate_instances(region, instance_ids, profile=None):
-    ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
+    ec2 = get_ec2_connection(region, profile=profile)
     # the loop is necessary to resume execution after a user interrupt
     while True:
         try:
@@ -757,75 +1418,66 @@ def terminate_instances(region, instance_ids, profile=None):
 
 
 def get_coordinator_public_hostname(cluster_name, region, profile=None, vpc_id=None):
-    coordinator_hostname = None
-    group = get_security_group_for_cluster(cluster_name, region, profile=profile, vpc_id=vpc_id)
-    if not group:
+    cluster = get_cluster_context(cluster_name, region, profile=profile, vpc_id=vpc_id)
+    if not cluster.group():
         return None
-    for instance in group.instances():
-        if instance.tags.get('cluster-role') == "coordinator":
-            coordinator_hostname = instance.public_dns_name
-            break
-    return coordinator_hostname
+    coordinators = cluster.instances_with_role("coordinator")
+    return coordinators[0].public_dns_name if coordinators else None
 
 
 def get_worker_public_hostnames(cluster_name, region, profile=None, vpc_id=None):
-    worker_hostnames = []
-    group = get_security_group_for_cluster(cluster_name, region, profile=profile, vpc_id=vpc_id)
-    if not group:
+    cluster = get_cluster_context(cluster_name, region, profile=profile, vpc_id=vpc_id)
+    if not cluster.group():
         return None
-    for instance in group.instances():
-        if instance.tags.get('cluster-role') == "worker":
-            worker_hostnames.append(instance.public_dns_name)
-    return worker_hostnames
+    return [instance.public_dns_name for instance in cluster.instances_with_role("worker")]
 
 
-def wait_for_all_instances_reachable(instance_ids, region, profile=None, verbosity=0):
-    while True:
-        ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
+def wait_for_all_instances_reachable(instance_ids, region, profile=None, on_reachable=None, verbosity=0):
+    """Wait until all instances pass their reachability checks.
+
+    If `on_reachable` is given, it is called with the IDs of newly reachable instances
+    after every poll that finds any, so callers can start working on them right away.
+    """
+    ec2 = get_ec2_connection(region, profile=profile)
+    reachable_ids = set()
+    def instances_reachable():
         statuses = ec2.get_all_instance_status(instance_ids=instance_ids, include_all_instances=True)
-        available_count = 0
+        newly_reachable_ids = []
         for status in statuses:
             if (status.state_name == "running" and
                 status.instance_status.status == "ok" and
                 status.instance_status.details['reachability'] == "passed"):
-                available_count += 1
+                if status.id not in reachable_ids:
+                    reachable_ids.add(status.id)
+                    newly_reachable_ids.append(status.id)
             elif status.state_name == "terminated":
                 raise ValueError("One or more instances are terminated")
-        if available_count == len(statuses):
-            # all instances reachable, so break out of while loop
-            break
-        if verbosity > 0:
-            click.secho("Not all instances reachable (%d/%d), waiting 60 seconds..." % (
-                available_count, len(statuses)), fg='yellow')
-        sleep(60)
+        if newly_reachable_ids and on_reachable:
+            on_reachable(newly_reachable_ids)
+        return (len(reachable_ids) == len(statuses),
+                "Not all instances reachable (%d/%d)" % (len(reachable_ids), len(statuses)))
+    return wait_until(instances_reachable, 'instances_reachable', verbosity=verbosity)
 
 
 def wait_for_all_workers_online(cluster_name, region, profile=None, vpc_id=None, verbosity=0):
+    import requests
     coordinator_hostname = get_coordinator_public_hostname(cluster_name, region, profile=profile, vpc_id=vpc_id)
     if not coordinator_hostname:
         raise ValueError("Couldn't resolve coordinator public DNS for cluster '%s'" % cluster_name)
     workers_url = "http://%(host)s:%(port)d/workers" % dict(host=coordinator_hostname, port=ANSIBLE_GLOBAL_VARS['myria_rest_port'])
-    while True:
+    def workers_online():
         try:
-            workers_resp = requests.get(workers_url)
-        except requests.ConnectionError:
-            if verbosity > 0:
-                click.secho("Myria service unavailable, waiting 60 seconds...", fg='yellow')
-        else:
-            if workers_resp.status_code == requests.codes.ok:
-                workers = workers_resp.json()
-                workers_alive_resp = requests.get(workers_url + "/alive")
-                workers_alive = workers_alive_resp.json()
-                if len(workers_alive) == len(workers):
-                    break
-                else:
-                    if verbosity > 0:
-                        click.secho("Not all Myria workers online (%d/%d), waiting 60 seconds..." % (
-                            len(workers_alive), len(workers)), fg='yellow')
-            else:
+            workers_resp = requests.get(workers_url, timeout=MYRIA_REST_TIMEOUT_SECS)
+            if workers_resp.status_code != requests.codes.ok:
                 raise MyriaError("Error response from Myria service (status code %d):\n%s" % (
                     workers_resp.status_code, workers_resp.text))
-        sleep(60)
+            workers = workers_resp.json()
+            workers_alive = requests.get(workers_url + "/alive", timeout=MYRIA_REST_TIMEOUT_SECS).json()
+        except (requests.ConnectionError, requests.Timeout):
+            return False, "Myria service unavailable"
+        return (len(workers_alive) == len(workers),
+                "Not all Myria workers online (%d/%d)" % (len(workers_alive), len(workers)))
+    return wait_until(workers_online, 'workers_online', verbosity=verbosity)
 
 
 def instance_type_family_from_instance_type(instance_type):
@@ -873,10 +1525,18 @@ def validate_console_logging(ctx, param, value):
     return value
 
 
+# settings already validated by this process, so repeated validation doesn't repeat the round trips
+VALIDATED_AWS_SETTINGS = set()
+
+
+@traced("validate AWS settings")
 def validate_aws_settings(region, profile=None, vpc_id=None, validate_default_vpc=True, prompt_for_credentials=False, verbosity=0):
+    from boto.exception import EC2ResponseError
+    if (region, profile, vpc_id, validate_default_vpc) in VALIDATED_AWS_SETTINGS:
+        return True
     # abort if credentials are not available
     try:
-        ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
+        ec2 = get_ec2_connection(region, profile=profile)
     except Exception as e:
         if verbosity > 0:
             click.secho(str(e), fg='red')
@@ -924,7 +1584,8 @@ http://boto3.readthedocs.io/en/latest/guide/configuration.html
 
     # abort if credentials exist but authN or authZ fails
     try:
-        ec2.get_all_instances()
+        # the smallest page EC2 allows is enough to verify access
+        ec2.get_all_instances(max_results=5)
     except EC2ResponseError as e:
         if e.status in [401, 403]:
             click.secho("""
@@ -933,7 +1594,7 @@ Please ask your administrator for authorization.
 """.format(region=region, profile=profile, vpc_id=vpc_id), fg='red')
             return False
 
-    vpc_conn = boto.vpc.connect_to_region(region, profile_name=profile)
+    vpc_conn = get_vpc_connection(region, profile=profile)
     # abort if VPC is not specified and no default VPC exists
     if not vpc_id:
         if validate_default_vpc:
@@ -954,6 +1615,7 @@ Please ask your administrator to create a default VPC or specify a VPC using the
 No VPC found with ID '{vpc_id}' in the '{region}' region.
 """.format(region=region, vpc_id=vpc_id), fg='red')
                 return False
+    VALIDATED_AWS_SETTINGS.add((region, profile, vpc_id, validate_default_vpc))
     return True
 
 
@@ -1098,8 +1760,9 @@ def validate_perfenforce(ctx, param, value):
     return value
 
 
+@traced("look up VPC")
 def get_vpc_from_subnet(subnet_id, region, profile=None, verbosity=0):
-    vpc_conn = boto.vpc.connect_to_region(region, profile_name=profile)
+    vpc_conn = get_vpc_connection(region, profile=profile)
     try:
         subnet = vpc_conn.get_all_subnets(subnet_ids=[subnet_id])[0]
         return subnet.vpc_id
@@ -1111,9 +1774,10 @@ def get_vpc_from_subnet(subnet_id, region, profile=None, verbosity=0):
         return None
 
 
+@traced("look up IAM user")
 def get_iam_user(region, profile=None, verbosity=0):
     # extract IAM user name for resource tagging
-    iam_conn = boto.iam.connect_to_region(region, profile_name=profile)
+    iam_conn = get_iam_connection(region, profile=profile)
     iam_user = None
     try:
         # TODO: once we move to boto3, we can get better info on callling principal from boto3.sts.get_caller_identity()
@@ -1126,6 +1790,7 @@ def get_iam_user(region, profile=None, verbosity=0):
 
 
 def get_block_device_mapping(**kwargs):
+    from boto.ec2.blockdevicemapping import BlockDeviceType, EBSBlockDeviceType, BlockDeviceMapping
     # Create block device mapping
     device_mapping = BlockDeviceMapping()
     # Generate all local volume mappings
@@ -1150,7 +1815,99 @@ def get_block_device_mapping(**kwargs):
     return device_mapping
 
 
-def run_playbook(playbook, private_key_file, extra_vars={}, tags=[], limit_hosts=[], max_retries=MAX_RETRIES_DEFAULT, verbosity=0):
+def update_checkpoints(checkpoints, task_timings):
+    """Updates {host: set of checkpoint keys} with the tasks completed or failed in a playbook run.
+
+    A checkpoint key is "play|role|task name", as computed by the myria_checkpoint strategy plugin.
+    A failure removes the key, so tasks whose name is not unique in a role are re-run if any of them failed.
+    """
+    failed = []
+    for t in task_timings:
+        key = "%s|%s|%s" % (t['play'], t['role'] or '', t['task'])
+        if t['status'] in CHECKPOINT_TASK_STATUSES:
+            checkpoints.setdefault(t['host'], set()).add(key)
+        else:
+            failed.append((t['host'], key))
+    for host, key in failed:
+        checkpoints.get(host, set()).discard(key)
+
+
+def get_ansible_forks(host_count):
+    """Returns the number of hosts Ansible should manage in parallel.
+
+    Forks mostly wait on SSH, so we can run several per local CPU, but each one is a
+    separate Python process, so we also cap the total.
+    """
+    from multiprocessing import cpu_count
+    return max(ANSIBLE_FORKS_MIN, min(host_count, cpu_count() * ANSIBLE_FORKS_PER_CPU, ANSIBLE_FORKS_MAX))
+
+
+def get_inventory_snapshot(instances):
+    """Projects (boto or cached) instances onto the fields stored in inventory snapshots by ec2_cluster_inventory.py."""
+    return [dict(public_ip_address=i.ip_address, private_ip_address=i.private_ip_address,
+                 public_dns_name=i.public_dns_name, private_dns_name=i.private_dns_name, tags=dict(i.tags))
+            for i in instances if i.state == 'running']
+
+
+def load_myria_role_defaults():
+    import yaml
+    with open(os.path.join(playbooks_dir, "roles/myria/defaults/main.yml"), 'r') as f:
+        return yaml.load(f)
+
+
+# repository and branch deployed by the myria role
+MYRIA_ROLE_DEFAULTS = LazyDict(load_myria_role_defaults)
+# Myria jars built on this machine (with --build-jar-locally) are kept here, one per commit;
+# the checkout is never cleaned and Gradle keeps its caches here too, so rebuilds are incremental
+JAR_BUILD_DIR = os.path.join(HOME, ".myria", "build")
+
+
+@traced("build Myria jar")
+def build_myria_jar(verbosity=0):
+    """Builds the Myria jar from the head of the deployed branch, unless it was already built from that commit.
+
+    Returns the commit and the path of the jar built from it.
+    """
+    from shutil import copyfile
+    repo_dir = os.path.join(JAR_BUILD_DIR, "myria")
+    jars_dir = os.path.join(JAR_BUILD_DIR, "jars")
+    with open(os.devnull, 'w') as devnull:
+        output = None if verbosity > 1 else devnull
+        if not os.path.exists(repo_dir):
+            subprocess.check_call(["git", "clone", MYRIA_ROLE_DEFAULTS['myria_repository_url'], repo_dir],
+                                  stdout=output, stderr=output)
+        subprocess.check_call(["git", "fetch", "origin", MYRIA_ROLE_DEFAULTS['myria_branch']],
+                              cwd=repo_dir, stdout=output, stderr=output)
+        subprocess.check_call(["git", "checkout", "--force", "FETCH_HEAD"], cwd=repo_dir, stdout=output, stderr=output)
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=repo_dir).strip()
+        jar_file = os.path.join(jars_dir, "myria-%s.jar" % commit)
+        if os.path.exists(jar_file):
+            if verbosity > 0:
+                click.secho("Using Myria jar already built from commit %s" % commit, fg='yellow')
+            return commit, jar_file
+        if verbosity > 0:
+            click.secho("Building Myria jar from commit %s..." % commit, fg='yellow')
+        env = dict(os.environ, GRADLE_USER_HOME=os.path.join(JAR_BUILD_DIR, "gradle"))
+        subprocess.check_call(["./gradlew", "shadowJar"], cwd=repo_dir, env=env, stdout=output, stderr=output)
+    if not os.path.exists(jars_dir):
+        os.makedirs(jars_dir)
+    # build/libs is never cleaned, so it may also hold jars of other Myria versions; take the one the myria role installs
+    built_jar = os.path.join(repo_dir, "build", "libs", "myria-%s-all.jar" % ANSIBLE_GLOBAL_VARS['myria_version'])
+    if not os.path.exists(built_jar):
+        raise ValueError("Myria build did not produce %s" % built_jar)
+    # copy atomically, so an interrupted copy is never mistaken for a finished jar
+    copyfile(built_jar, jar_file + ".tmp")
+    os.rename(jar_file + ".tmp", jar_file)
+    return commit, jar_file
+
+
+def run_playbook(playbook, private_key_file, extra_vars={}, tags=[], skip_tags=[], limit_hosts=[], instances=None, max_retries=MAX_RETRIES_DEFAULT, on_start=None, verbosity=0):
+    """Runs `playbook` on the cluster, retrying failed hosts up to `max_retries` times.
+
+    If `instances` is given, it is used as the cluster inventory instead of querying EC2.
+    If `on_start` is given, it is called with the Popen object of each ansible-playbook run,
+    which is started in its own process group so the caller can kill it with all its workers.
+    """
     extra_vars = deepcopy(extra_vars) # don't mutate the caller's copy
     # this should be done in an env var but Ansible maintainers are too stupid to support it
     extra_vars.update(ansible_python_interpreter='/usr/bin/env python')
@@ -1159,11 +1916,37 @@ def run_playbook(playbook, private_key_file, extra_vars={}, tags=[], limit_hosts
     profile = extra_vars.get('PROFILE')
     vpc_id = extra_vars.get('VPC_ID')
     playbook_path = os.path.join(playbooks_dir, playbook)
+    # we want to use only the Ansible executable in our dependent package
+    from distutils.spawn import find_executable
+    ansible_executable_path = find_executable("ansible-playbook")
     inventory = "localhost," # comma is not a typo, Ansible is just stupid
     # Override default retry files directory
     ansible_retry_tmpdir = mkdtemp()
+    # size forks from the number of hosts the first attempt runs on (retries run on fewer)
+    if limit_hosts:
+        host_count = len(limit_hosts)
+    elif instances is not None:
+        host_count = len(instances)
+    else:
+        host_count = extra_vars.get('CLUSTER_SIZE', ANSIBLE_FORKS_MIN)
+    forks = get_ansible_forks(host_count)
     retry_filename = os.path.join(ansible_retry_tmpdir, os.path.splitext(os.path.basename(playbook))[0] + ".retry")
+    task_timings_filename = os.path.join(ansible_retry_tmpdir, "task_timings.json")
     env = dict(os.environ, ANSIBLE_RETRY_FILES_SAVE_PATH=ansible_retry_tmpdir)
+    # record per-task, per-host timings with our callback plugin
+    env['ANSIBLE_CALLBACK_PLUGINS'] = os.path.join(playbooks_dir, "callback_plugins")
+    env['ANSIBLE_CALLBACK_WHITELIST'] = ','.join(filter(None, [os.environ.get('ANSIBLE_CALLBACK_WHITELIST'), "myria_timings"]))
+    env[TASK_TIMINGS_FILE_ENV_VAR] = task_timings_filename
+    # on retries, skip tasks already completed on each failed host (see strategy_plugins/myria_checkpoint.py)
+    # and reuse the inventory queried by the first attempt
+    checkpoint_filename = os.path.join(ansible_retry_tmpdir, "checkpoints.json")
+    env['ANSIBLE_STRATEGY_PLUGINS'] = os.path.join(playbooks_dir, "strategy_plugins")
+    env[CHECKPOINT_FILE_ENV_VAR] = checkpoint_filename
+    extra_vars['INVENTORY_SNAPSHOT_FILE'] = os.path.join(ansible_retry_tmpdir, "inventory.json")
+    if instances is not None:
+        with open(extra_vars['INVENTORY_SNAPSHOT_FILE'], 'w') as f:
+            json.dump(get_inventory_snapshot(instances), f)
+    checkpoints = {}
     # see https://github.com/ansible/ansible/pull/9404/files
     retries = 0
     failed_hosts = []
@@ -1172,13 +1955,22 @@ def run_playbook(playbook, private_key_file, extra_vars={}, tags=[], limit_hosts
             limit_hosts = failed_hosts
         if limit_hosts:
             extra_vars['LIMIT_HOSTS'] = limit_hosts
-        # TODO: --module-path is for 2.2 version of ec2_remote_facts.py, remove (along with myria/cluster/playbooks/ec2_remote_facts.py) when Ansible 2.2 is released
-        ansible_args = [ANSIBLE_EXECUTABLE_PATH, playbook_path, "--inventory", inventory, "--extra-vars", json.dumps(extra_vars), "--private-key", private_key_file, "--module-path", playbooks_dir]
+        # our own modules are found in library/ next to the playbook
+        ansible_args = [ansible_executable_path, playbook_path, "--inventory", inventory, "--extra-vars", json.dumps(extra_vars), "--private-key", private_key_file, "--forks", str(forks)]
         if tags:
             ansible_args.extend(["--tags", ','.join(tags)])
+        if skip_tags:
+            ansible_args.extend(["--skip-tags", ','.join(skip_tags)])
         if verbosity > 0:
             ansible_args.append("-" + ('v' * verbosity))
-        status = subprocess.call(ansible_args, env=env)
+        with TRACER.span("run %s" % playbook, attempt=retries + 1, hosts=limit_hosts, tags=tags, skip_tags=skip_tags):
+            proc = subprocess.Popen(ansible_args, env=env, preexec_fn=os.setpgrp if on_start else None)
+            if on_start:
+                on_start(proc)
+            status = proc.wait()
+        task_timings = load_task_timings(task_timings_filename)
+        TRACER.add_task_timings(task_timings)
+        update_checkpoints(checkpoints, task_timings)
         # handle failure
         if status != 0:
             if verbosity > 0:
@@ -1190,6 +1982,8 @@ def run_playbook(playbook, private_key_file, extra_vars={}, tags=[], limit_hosts
                     with open(retry_filename,'r') as f:
                         failed_hosts = f.read().splitlines() 
                     assert failed_hosts # should always have at least one failed host with these exit codes
+                    with open(checkpoint_filename, 'w') as f:
+                        json.dump(dict((host, sorted(checkpoints.get(host, []))) for host in failed_hosts), f)
                     click.secho("Playbook run failed on hosts %s, retrying (%d/%d)..." % (', '.join(failed_hosts), retries, max_retries), fg='yellow')
                     continue
                 else:
@@ -1201,7 +1995,99 @@ def run_playbook(playbook, private_key_file, extra_vars={}, tags=[], limit_hosts
             return True
 
 
+class ProvisioningPipeline(object):
+    """Provisions instances in batches as soon as they become reachable.
+
+    Plays tagged `node-local` in remote.yml run in a background thread for each batch
+    passed to submit(), overlapping with the wait for the remaining instances. Plays
+    tagged `cluster-wide` need the complete cluster and only run from finish().
+    Call cancel() before terminating any submitted instances.
+    """
+    def __init__(self, private_key_file, extra_vars, tags, verbosity=0):
+        self.private_key_file = private_key_file
+        self.extra_vars = extra_vars
+        self.tags = tags
+        self.verbosity = verbosity
+        self.region = extra_vars['REGION']
+        self.profile = extra_vars.get('PROFILE')
+        self.threads = []
+        self.hosts = []
+        self.failed_hosts = []
+        self.processes = []
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def submit(self, instance_ids):
+        if self.cancelled:
+            return
+        # instance objects returned at launch have no public IP yet
+        instances = get_ec2_connection(self.region, profile=self.profile).get_only_instances(instance_ids=instance_ids)
+        hosts = [i.ip_address for i in instances]
+        if self.verbosity > 0:
+            click.secho("Provisioning newly reachable hosts %s..." % ', '.join(hosts), fg='yellow')
+        thread = threading.Thread(target=self._provision_node_local, args=(hosts,),
+                                  name="provision batch %d" % (len(self.threads) + 1))
+        thread.daemon = True
+        thread.start()
+        self.threads.append(thread)
+        self.hosts.extend(hosts)
+
+    def _provision_node_local(self, hosts):
+        if not run_playbook("remote.yml", self.private_key_file, extra_vars=self.extra_vars, tags=self.tags,
+                            skip_tags=['cluster-wide'], limit_hosts=hosts, on_start=self._started,
+                            verbosity=self.verbosity):
+            with self.lock:
+                self.failed_hosts.extend(hosts)
+
+    def _started(self, proc):
+        with self.lock:
+            self.processes.append(proc)
+            if self.cancelled:
+                self._kill(proc)
+
+    @staticmethod
+    def _kill(proc):
+        if proc.poll() is None:
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+            except OSError:
+                pass # already exited
+
+    def cancel(self):
+        """Kill all running node-local provisioning and wait for its threads to exit."""
+        with self.lock:
+            self.cancelled = True
+            for proc in self.processes:
+                self._kill(proc)
+        for thread in self.threads:
+            thread.join()
+
+    def finish(self):
+        """Wait for all node-local provisioning, then run the cluster-wide plays.
+
+        Returns True if all plays succeeded on every submitted host.
+        """
+        for thread in self.threads:
+            thread.join()
+        if self.failed_hosts:
+            click.secho("Failed to provision hosts %s" % ', '.join(self.failed_hosts), fg='red')
+            return False
+        return run_playbook("remote.yml", self.private_key_file, extra_vars=self.extra_vars, tags=self.tags,
+                            skip_tags=['node-local'], limit_hosts=self.hosts, verbosity=self.verbosity)
+
+
 class CustomOption(click.Option):
+    def __init__(self, *args, **kwargs):
+        # callable computing the default shown in help, for defaults that are expensive to compute
+        self.default_help = kwargs.pop('default_help', None)
+        click.Option.__init__(self, *args, **kwargs)
+
+    def get_help_record(self, ctx):
+        record = click.Option.get_help_record(self, ctx)
+        if record is not None and self.default_help is not None:
+            record = (record[0], "%s [default: %s]" % (record[1], self.default_help()))
+        return record
+
     def full_process_value(self, ctx, value):
         if value is not None:
             if ctx.params.get('perfenforce') and self.name in PERFENFORCE_DEFAULTS:
@@ -1213,10 +2099,29 @@ class CustomOption(click.Option):
         return click.Option.full_process_value(self, ctx, value)
 
 
+def get_cli_version():
+    import pkg_resources
+    try:
+        return pkg_resources.get_distribution("myria-cluster").version
+    except pkg_resources.DistributionNotFound:
+        return "unknown"
+
+
+def print_version(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo("%s, version %s" % (ctx.find_root().info_name, get_cli_version()))
+    ctx.exit()
+
+
 @click.group(context_settings=CONTEXT_SETTINGS)
-@click.version_option(version=VERSION)
-def run():
-    pass
+@click.option('--version', is_flag=True, expose_value=False, is_eager=True, callback=print_version,
+    help="Show the version and exit.")
+@click.option('--aws-stats', is_flag=True,
+    help="Print the number of AWS API requests issued by the command on exit")
+def run(aws_stats):
+    if aws_stats:
+        atexit.register(echo_aws_request_counts)
 
 
 @run.command('create')
@@ -1258,35 +2163,59 @@ def run():
     help="IOPS to provision for each EBS data volume (only applies to 'io1' volume type)")
 @click.option('--data-volume-count', cls=CustomOption, type=click.IntRange(1, 8), callback=validate_data_volume_count,
     help="Number of EBS data volumes to attach to this instance [default: %d]" % DEFAULTS['data_volume_count'])
+@click.option('--volume-layout', cls=CustomOption, show_default=True, default=DEFAULTS['volume_layout'],
+    type=click.Choice(['separate', 'raid0']),
+    help="Mount each data volume separately, or stripe all data volumes into one RAID0 array")
 @click.option('--driver-mem-gb', cls=CustomOption, type=float, show_default=True, default=DEFAULTS['driver_mem_gb'], callback=validate_driver_mem,
     help="Physical memory (in GB) reserved for Myria driver")
 @click.option('--workers-per-node', cls=CustomOption, type=int, callback=validate_workers_per_node,
-    help="Number of Myria workers per cluster node [default: %d]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].workers_per_node)
+    help="Number of Myria workers per cluster node",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].workers_per_node)
 @click.option('--node-vcores', cls=CustomOption, type=int, callback=validate_node_vcores,
-    help="Number of virtual CPUs on each EC2 instance available for Myria processes [default: %d]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].node_vcores)
+    help="Number of virtual CPUs on each EC2 instance available for Myria processes",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].node_vcores)
 @click.option('--node-mem-gb', cls=CustomOption, type=float, callback=validate_node_mem,
-    help="Physical memory (in GB) on each EC2 instance available for Myria processes [default: %s]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].node_mem_gb)
+    help="Physical memory (in GB) on each EC2 instance available for Myria processes",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].node_mem_gb)
 @click.option('--worker-vcores', cls=CustomOption, type=int, callback=validate_worker_vcores,
-    help="Number of virtual CPUs reserved for each Myria worker [default: %d]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].worker_vcores)
+    help="Number of virtual CPUs reserved for each Myria worker",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].worker_vcores)
 @click.option('--worker-mem-gb', cls=CustomOption, type=float, callback=validate_worker_mem,
-    help="Physical memory (in GB) reserved for each Myria worker [default: %s]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].worker_mem_gb)
+    help="Physical memory (in GB) reserved for each Myria worker",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].worker_mem_gb)
 @click.option('--coordinator-vcores', cls=CustomOption, type=int, callback=validate_coordinator_vcores,
-    help="Number of virtual CPUs reserved for Myria coordinator [default: %d]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].coordinator_vcores)
+    help="Number of virtual CPUs reserved for Myria coordinator",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].coordinator_vcores)
 @click.option('--coordinator-mem-gb', cls=CustomOption, type=float, callback=validate_coordinator_mem,
-    help="Physical memory (in GB) reserved for Myria coordinator [default: %s]" % INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].coordinator_mem_gb)
+    help="Physical memory (in GB) reserved for Myria coordinator",
+    default_help=lambda: INSTANCE_TYPE_DEFAULTS[DEFAULTS['instance_type']].coordinator_mem_gb)
 @click.option('--heap-mem-fraction', cls=CustomOption, type=float, show_default=True, default=DEFAULTS['heap_mem_fraction'],
     help="Fraction of container memory used for JVM heap")
 @click.option('--cluster-log-level', cls=CustomOption, show_default=True,
     type=click.Choice(LOG_LEVELS), default=DEFAULTS['cluster_log_level'])
 @click.option('--jupyter-password', cls=CustomOption, default=None,
     help="Login password for the Jupyter notebook server (defaults to no authentication)")
+@click.option('--timings', cls=CustomOption, is_flag=True,
+    help="Print a summary of time spent in each phase when finished")
 @click.pass_context
 def create_cluster(ctx, cluster_name, **kwargs):
     verbosity = 3 if kwargs['verbose'] else 0 if kwargs['silent'] else 1
+    begin_trace('create', cluster_name, timings=kwargs.pop('timings'))
     # If perfenforce is enabled, we override the cluster configuration
     if kwargs['perfenforce']:
         if verbosity > 1:
             click.secho("Overriding cluster options for PerfEnforce:\n%s" % repr(PERFENFORCE_DEFAULTS), fg='yellow')
+    # checked here rather than in a callback since it depends on options that may be parsed after it
+    if kwargs['volume_layout'] == 'raid0':
+        if kwargs['storage_type'] == 'local':
+            data_volume_count = EPHEMERAL_VOLUMES_BY_INSTANCE_TYPE.get(kwargs['instance_type'], 0)
+        else:
+            data_volume_count = kwargs['data_volume_count']
+        if data_volume_count < 2:
+            click.secho("--volume-layout=raid0 requires at least 2 data volumes (this configuration has %d)" % data_volume_count, fg='red')
+            sys.exit(1)
+    kwargs.update(get_postgres_profile(kwargs['node_mem_gb'], kwargs['workers_per_node'], kwargs['worker_vcores']))
+    pipeline = None
     try:
         # we need to validate first without the VPC since it hasn't been determined yet
         if not validate_aws_settings(kwargs['region'], profile=kwargs['profile'], vpc_id=None, validate_default_vpc=False, prompt_for_credentials=True, verbosity=verbosity):
@@ -1333,11 +2262,6 @@ def create_cluster(ctx, cluster_name, **kwargs):
                                                     profile=kwargs['profile'], verbosity=verbosity):
             sys.exit(1)
 
-        # create security group and apply tags
-        group = create_security_group_for_cluster(cluster_name, verbosity=verbosity, **kwargs)
-        # launch all instances in this cluster
-        launch_cluster(cluster_name, device_mapping=device_mapping, verbosity=verbosity, **kwargs)
-
         # run remote playbook to provision EC2 instances
         extra_vars = dict((k.upper(), v) for k, v in kwargs.iteritems() if v is not None and not k.startswith('__'))
         extra_vars.update(CLUSTER_NAME=cluster_name)
@@ -1353,7 +2277,13 @@ def create_cluster(ctx, cluster_name, **kwargs):
             click.echo(json.dumps(extra_vars))
 
         tags = ['provision', 'configure'] if kwargs['unprovisioned'] else ['configure']
-        if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=tags, verbosity=verbosity):
+        pipeline = ProvisioningPipeline(kwargs['private_key_file'], extra_vars, tags, verbosity=verbosity)
+
+        # create security group and apply tags
+        group = create_security_group_for_cluster(cluster_name, verbosity=verbosity, **kwargs)
+        # launch all instances in this cluster, provisioning each one as soon as it is reachable
+        launch_cluster(cluster_name, device_mapping=device_mapping, on_reachable=pipeline.submit, verbosity=verbosity, **kwargs)
+        if not pipeline.finish():
             raise ValueError("Failed to provision instances for cluster '%s'" % cluster_name)
 
         # wait for all workers to become available
@@ -1366,6 +2296,7 @@ def create_cluster(ctx, cluster_name, **kwargs):
         coordinator_public_hostname = get_coordinator_public_hostname(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
         if not coordinator_public_hostname:
             raise ValueError("Couldn't resolve coordinator public DNS for cluster '%s'" % cluster_name)
+        get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id']).save_cache()
     except MyriaError:
         click.secho("""
 The Myria service on your cluster '{cluster_name}' in the '{region}' region returned an error.
@@ -1378,6 +2309,8 @@ Please refer to the error message above for diagnosis. Exiting (not destroying c
         if verbosity > 1:
             click.secho(traceback.format_exc(), fg='red')
         click.secho("Unexpected error, destroying cluster...", fg='red')
+        if pipeline is not None:
+            pipeline.cancel()
         try:
             terminate_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
         except:
@@ -1471,16 +2404,16 @@ def default_key_file(ctx, param, value):
     help="Private key file for your EC2 key pair [default: %s]" % ("%s/.ssh/%s-myria_%s.pem" % (HOME, USER, DEFAULTS['region'])))
 @click.option('--node-id', type=int, default=0,
     help="Node ID of the cluster node you want to log into (coordinator by default)")
+@click.option('--refresh', is_flag=True,
+    help="Query EC2 for the cluster topology instead of using the local cache")
 def login_to_node(cluster_name, **kwargs):
-    group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
-    if not group:
+    cluster = get_cached_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'],
+                                         vpc_id=kwargs['vpc_id'], refresh=kwargs['refresh'])
+    if not cluster.group():
         click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
         sys.exit(1)
-    public_hostname = None
-    for instance in group.instances():
-        if int(instance.tags.get('node-id')) == kwargs['node_id']:
-            public_hostname = instance.public_dns_name
-            break
+    instance = cluster.instance_by_node_id(kwargs['node_id'])
+    public_hostname = instance.public_dns_name if instance else None
     if not public_hostname:
         click.secho("No node found in cluster '%s', region '%s' with node ID %d." % (cluster_name, kwargs['region'], kwargs['node_id']), fg='red')
         sys.exit(1)
@@ -1495,20 +2428,90 @@ def login_to_node(cluster_name, **kwargs):
     sys.exit(subprocess.call(ssh_arg_str, shell=True))
 
 
-def exec_command_on_host(host, cmd, private_key_file):
-    user_host = "'%s@%s'" % (ANSIBLE_GLOBAL_VARS['remote_user'], host)
-    ssh_opts = ["ssh", "-T",
-                "-i", private_key_file,
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "UserKnownHostsFile=/dev/null"]
-    ssh_args = ssh_opts + [user_host]
-    ssh_arg_str = ' '.join(ssh_args)
-    cmdline = """
-{ssh_arg_str} 2>/dev/null <<EOF
-{cmd}
-EOF
-""".format(ssh_arg_str=ssh_arg_str, cmd=cmd)
-    return subprocess.call(cmdline, shell=True)
+SSHTarget = namedtuple('SSHTarget', ['label', 'host', 'cmd'])
+SSHResult = namedtuple('SSHResult', ['label', 'host', 'returncode', 'elapsed'])
+
+SSH_LABEL_COLORS = ['cyan', 'green', 'yellow', 'blue', 'magenta']
+
+
+def ssh_command_args(host, private_key_file):
+    return ["ssh", "-T",
+            "-i", private_key_file,
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "UserKnownHostsFile=/dev/null",
+            "-o", "LogLevel=ERROR",
+            "-o", "BatchMode=yes",
+            "-o", "ControlMaster=auto",
+            "-o", "ControlPersist=%s" % SSH_CONTROL_PERSIST,
+            "-o", "ControlPath=%s" % SSH_CONTROL_PATH,
+            "%s@%s" % (ANSIBLE_GLOBAL_VARS['remote_user'], host)]
+
+
+def exec_command_on_hosts(targets, private_key_file, parallel=SSH_PARALLELISM_DEFAULT, on_line=None):
+    """Run each target's command over ssh, at most `parallel` hosts at a time.
+
+    Output is streamed line by line as it arrives, prefixed with the target's label
+    (or passed to `on_line(target, line)` if given). Returns an `SSHResult` per target,
+    in the order the targets were given.
+    """
+    output_lock = threading.Lock()
+    label_width = max(len(t.label) for t in targets) if targets else 0
+    results = [None] * len(targets)
+    pending = list(enumerate(targets))
+    pending.reverse()
+
+    def echo_line(index, target, line):
+        with output_lock:
+            if on_line:
+                on_line(target, line)
+            else:
+                color = SSH_LABEL_COLORS[index % len(SSH_LABEL_COLORS)]
+                click.echo("%s | %s" % (click.style(target.label.ljust(label_width), fg=color), line))
+
+    def run_target(index, target):
+        start = time()
+        try:
+            proc = subprocess.Popen(ssh_command_args(target.host, private_key_file),
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError as e:
+            echo_line(index, target, "Failed to start ssh: %s" % e)
+            return SSHResult(target.label, target.host, 255, time() - start)
+        # the command is passed on stdin so the remote login shell interprets it, not ours
+        proc.stdin.write(target.cmd.encode('utf-8') + b'\n')
+        proc.stdin.close()
+        for line in iter(proc.stdout.readline, b''):
+            echo_line(index, target, line.rstrip('\n'))
+        proc.stdout.close()
+        returncode = proc.wait()
+        return SSHResult(target.label, target.host, returncode, time() - start)
+
+    def worker():
+        while True:
+            with output_lock:
+                if not pending:
+                    return
+                index, target = pending.pop()
+            results[index] = run_target(index, target)
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(parallel, len(targets))))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    # join with a timeout so the main thread still sees KeyboardInterrupt
+    for t in threads:
+        while t.is_alive():
+            t.join(1)
+    return results
+
+
+def echo_exec_summary(results):
+    format_str = "{: <20} {: <50} {: <6} {: <10}"
+    click.echo()
+    click.echo(format_str.format('NODE', 'HOST', 'EXIT', 'ELAPSED'))
+    click.echo(format_str.format('----', '----', '----', '-------'))
+    for result in results:
+        click.secho(format_str.format(result.label, result.host, result.returncode, "%.1fs" % result.elapsed),
+                    fg='green' if result.returncode == 0 else 'red')
 
 
 def validate_log_options(ctx, param, value):
@@ -1518,6 +2521,209 @@ def validate_log_options(ctx, param, value):
     return value
 
 
+# severities as they appear in log4j/logback output, most severe first
+LOG_SEVERITIES = ['FATAL', 'ERROR', 'WARN', 'INFO', 'DEBUG', 'TRACE']
+# how long followed log lines are held back so lines from different nodes can be put in timestamp order
+LOG_REORDER_WINDOW_SECS = 1.0
+# how often a followed node looks for newly started YARN containers
+LOG_CONTAINER_POLL_SECS = 5
+LOG_TIMESTAMP_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})(?:[,.](\d{1,6}))?')
+LOG_SINCE_RE = re.compile(r'^(\d+)([smhd])$')
+
+
+def validate_log_since(ctx, param, value):
+    if value is None:
+        return value
+    m = LOG_SINCE_RE.match(value)
+    if m:
+        unit = dict(s='seconds', m='minutes', h='hours', d='days')[m.group(2)]
+        since = datetime.utcnow() - timedelta(**{unit: int(m.group(1))})
+    else:
+        from dateutil.parser import parse as dateparse
+        from dateutil.tz import tzutc
+        try:
+            since = dateparse(value)
+        except (ValueError, OverflowError):
+            raise click.BadParameter("Must be a duration like 30s, 10m, 2h, 1d or a timestamp like '2016-10-17 12:00:00'")
+        if since.tzinfo is not None:
+            since = since.astimezone(tzutc()).replace(tzinfo=None)
+    # cluster nodes log in UTC
+    return since.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# Regex syntax that the mawk 1.3.3 on our (trusty) nodes either matches literally (\d matches "d",
+# a{2} matches "a{2}") or rejects at runtime, which would end the log stream on every node
+UNSUPPORTED_LOG_PATTERN_SYNTAX = [
+    (re.compile(r'\(\?'), "(?...) groups and flags"),
+    (re.compile(r'[*+?}][?+]'), "lazy and possessive quantifiers"),
+    (re.compile(r'\\[dDwWsSbBAZ]'), "Perl character classes and anchors (use e.g. [0-9] or [ \\t])"),
+    (re.compile(r'\\[0-9]'), "backreferences"),
+    (re.compile(r'\{[0-9]'), "interval expressions (repeat the atom instead)"),
+    (re.compile(r'\[:'), "POSIX character classes (use e.g. [0-9] or [ \\t])"),
+]
+
+
+def validate_log_pattern(ctx, param, value):
+    """Checks that `value` is an extended regular expression that mawk, which filters logs on the nodes, supports."""
+    if value is not None:
+        try:
+            re.compile(value)
+        except re.error as e:
+            raise click.BadParameter("Invalid regular expression: %s" % e)
+        # skip escaped characters, except those that start unsupported escapes
+        unescaped = re.sub(r'\\[^dDwWsSbBAZ0-9]', '', value)
+        for syntax, description in UNSUPPORTED_LOG_PATTERN_SYNTAX:
+            if syntax.search(unescaped):
+                raise click.BadParameter("Not supported by awk on the cluster nodes: %s" % description)
+    return value
+
+
+# Runs on each node: tails every log source in the background, prefixing each line with its source,
+# and picks up container logs as YARN creates them. All filtering happens in the awk stage so only
+# matching lines cross the network. Lines without a timestamp (e.g. stack traces) follow the fate of
+# the last timestamped line from the same source. (Ubuntu's awk is mawk, which block-buffers its input
+# on pipes unless run in interactive mode.)
+FOLLOW_LOGS_SCRIPT = """
+follow() {
+    local source=$1; shift
+    sudo tail -q -n %(lines)s -F "$@" 2>/dev/null | sed -u "s/^/$source\t/" &
+}
+follow_containers() {
+    declare -A seen
+    local lines=%(lines)s
+    while true; do
+        for f in $(sudo find %(userlogs_dir)s -type f -path '*/container_*/*' 2>/dev/null); do
+            if [ -z "${seen[$f]}" ]; then
+                seen[$f]=1
+                container=$(basename $(dirname $f))
+                sudo tail -q -n $lines -F $f 2>/dev/null | sed -u "s/^/container ${container##*_}\/$(basename $f)\t/" &
+            fi
+        done
+        lines=+1
+        sleep %(poll_secs)d
+    done
+}
+sources() {
+%(follow_cmds)s
+    wait
+}
+sources | LOG_SINCE=%(since)s LOG_LEVELS=%(levels)s LOG_PATTERN=%(pattern)s mawk -W interactive -F '\t' '
+{
+    src = $1
+    text = substr($0, length(src) + 2)
+    if (text ~ /^[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9][ T][0-9][0-9]:[0-9][0-9]:[0-9][0-9]/) {
+        ts = substr(text, 1, 10) " " substr(text, 12, 8)
+        keep[src] = (ENVIRON["LOG_SINCE"] == "" || ts >= ENVIRON["LOG_SINCE"]) && (ENVIRON["LOG_LEVELS"] == "" || text ~ ENVIRON["LOG_LEVELS"])
+    } else if (!(src in keep)) {
+        keep[src] = (ENVIRON["LOG_SINCE"] == "" && ENVIRON["LOG_LEVELS"] == "")
+    }
+    if (keep[src] && (ENVIRON["LOG_PATTERN"] == "" || text ~ ENVIRON["LOG_PATTERN"])) {
+        print
+        fflush()
+    }
+}'
+"""
+
+
+def follow_logs_cmdline(log_paths, userlogs_dir=None, lines=10, since=None, level=None, pattern=None):
+    follow_cmds = ["    follow %s %s" % (pipes.quote(source), path) for source, path in log_paths]
+    if userlogs_dir:
+        follow_cmds.append("    follow_containers &")
+    levels = ""
+    if level:
+        severities = LOG_SEVERITIES[:LOG_SEVERITIES.index(level) + 1]
+        levels = "(^|[^A-Z])(%s)([^A-Z]|$)" % '|'.join(severities)
+    return FOLLOW_LOGS_SCRIPT % dict(
+        lines="+1" if since else int(lines),
+        userlogs_dir=pipes.quote(userlogs_dir or "/nonexistent"),
+        poll_secs=LOG_CONTAINER_POLL_SECS,
+        follow_cmds='\n'.join(follow_cmds),
+        since=pipes.quote(since or ""),
+        levels=pipes.quote(levels),
+        pattern=pipes.quote(pattern or ""))
+
+
+class LogInterleaver(object):
+    """Buffers log lines from many nodes for a short window and prints them in timestamp order.
+
+    Lines without a timestamp inherit the timestamp of the previous line from the same node
+    and source, so multi-line messages stay together.
+    """
+
+    def __init__(self, window=LOG_REORDER_WINDOW_SECS):
+        self.window = window
+        self.heap = []
+        self.seq = 0
+        self.last_timestamps = {}
+        self.label_width = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically)
+        self.flusher.daemon = True
+
+    def start(self):
+        self.flusher.start()
+
+    def add(self, target, line):
+        source, _, text = line.partition('\t')
+        m = LOG_TIMESTAMP_RE.match(text)
+        with self.lock:
+            key = (target.label, source)
+            if m:
+                timestamp = "%s %s.%s" % (m.group(1), m.group(2), (m.group(3) or "").ljust(6, '0'))
+                self.last_timestamps[key] = timestamp
+            else:
+                timestamp = self.last_timestamps.get(key, "")
+            self.seq += 1
+            self.label_width = max(self.label_width, len(target.label))
+            heapq.heappush(self.heap, (timestamp, self.seq, time(), target.label, source, text))
+
+    def flush(self, force=False):
+        with self.lock:
+            cutoff = time() - self.window
+            while self.heap and (force or self.heap[0][2] <= cutoff):
+                _, _, _, label, source, text = heapq.heappop(self.heap)
+                click.echo("%s | %s | %s" % (click.style(label.ljust(self.label_width), fg='cyan'),
+                                             click.style(source, fg='yellow'), text))
+
+    def stop(self):
+        self.done.set()
+        self.flush(force=True)
+
+    def _flush_periodically(self):
+        while not self.done.wait(self.window / 4):
+            self.flush()
+
+
+def follow_logs(coordinator_public_hostname, worker_public_hostnames, node_ids_by_host, **kwargs):
+    service_logs_dir = "/var/log/upstart"
+    hadoop_logs_dir = os.path.join(ANSIBLE_GLOBAL_VARS['default_data_dir'], "hadoop", "logs")
+    userlogs_dir = os.path.join(hadoop_logs_dir, "userlogs") if not kwargs['system_logs'] else None
+    master_log_paths = []
+    slave_log_paths = []
+    if kwargs['system_logs'] or kwargs['all']:
+        master_log_paths = [("myria", os.path.join(service_logs_dir, "myria.log")),
+                            ("myria-web", os.path.join(service_logs_dir, "myria-web.log")),
+                            ("resourcemanager", os.path.join(hadoop_logs_dir, "yarn--resourcemanager*out"))]
+        slave_log_paths = [("nodemanager", os.path.join(hadoop_logs_dir, "yarn--nodemanager*out"))]
+    filters = dict(userlogs_dir=userlogs_dir, lines=kwargs['lines'], since=kwargs['since'],
+                   level=kwargs['level'], pattern=kwargs['grep'])
+    targets = [SSHTarget("coordinator", coordinator_public_hostname,
+                         follow_logs_cmdline(master_log_paths + slave_log_paths, **filters))]
+    for worker_public_hostname in worker_public_hostnames:
+        targets.append(SSHTarget("node %d" % node_ids_by_host[worker_public_hostname], worker_public_hostname,
+                                 follow_logs_cmdline(slave_log_paths, **filters)))
+
+    interleaver = LogInterleaver()
+    interleaver.start()
+    try:
+        exec_command_on_hosts(targets, kwargs['private_key_file'], parallel=len(targets), on_line=interleaver.add)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        interleaver.stop()
+
+
 @run.command('logs')
 @click.argument('cluster_name')
 @click.option('--profile', default=None,
@@ -1532,25 +2738,40 @@ def validate_log_options(ctx, param, value):
     help="Display only YARN daemon logs")
 @click.option('--all', is_flag=True, callback=validate_log_options,
     help="Display both YARN container and daemon logs (only container logs are displayed by default)")
+@click.option('--parallel', type=click.IntRange(1, None), show_default=True, default=SSH_PARALLELISM_DEFAULT,
+    help="Maximum number of nodes to fetch logs from concurrently")
+@click.option('--follow', '-f', is_flag=True,
+    help="Continuously follow logs from all nodes, interleaved by timestamp (does not restart Myria)")
+@click.option('--lines', '-n', type=click.IntRange(0, None), show_default=True, default=10,
+    help="Number of existing lines to show from each log when following")
+@click.option('--level', type=click.Choice(LOG_SEVERITIES), default=None,
+    help="Only show messages at this severity or above (requires --follow)")
+@click.option('--grep', default=None, callback=validate_log_pattern,
+    help="Only show lines matching this awk (POSIX extended) regular expression, without Perl syntax such as \\d, (?i) or *? (requires --follow)")
+@click.option('--since', default=None, callback=validate_log_since,
+    help="Only show messages since this UTC time or for this duration, e.g. 10m (requires --follow)")
+@click.option('--refresh', is_flag=True,
+    help="Query EC2 for the cluster topology instead of using the local cache")
 def print_logs(cluster_name, **kwargs):
-    def get_node_ids_by_host(group):
-        node_ids_by_host = {}
-        for instance in group.instances():
-            node_ids_by_host[instance.public_dns_name] = int(instance.tags.get('node-id'))
-        return node_ids_by_host
-
-    group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
-    if not group:
+    cluster = get_cached_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'],
+                                         vpc_id=kwargs['vpc_id'], refresh=kwargs['refresh'])
+    if not cluster.group():
         click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
         sys.exit(1)
-    node_ids_by_host = get_node_ids_by_host(group)
-    cluster_log_level = get_dict_from_cluster_metadata(group)['cluster_log_level']
+    node_ids_by_host = dict((i.public_dns_name, int(i.tags.get('node-id'))) for i in cluster.instances())
+    cluster_log_level = cluster.metadata()['cluster_log_level']
     coordinator_public_hostname = get_coordinator_public_hostname(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
     if not coordinator_public_hostname:
         raise ValueError("Couldn't resolve coordinator public DNS for cluster '%s' in region '%s'" % (cluster_name, kwargs['region']))
     worker_public_hostnames = get_worker_public_hostnames(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
     if not worker_public_hostnames:
         raise ValueError("Couldn't resolve workers public DNS for cluster '%s' in region '%s'" % (cluster_name, kwargs['region']))
+    if not kwargs['follow'] and (kwargs['level'] or kwargs['grep'] or kwargs['since']):
+        raise click.UsageError("--level, --grep and --since can only be used with --follow")
+    if kwargs['follow']:
+        click.secho("Cluster log level is %s...\n" % cluster_log_level, fg='yellow')
+        follow_logs(coordinator_public_hostname, worker_public_hostnames, node_ids_by_host, **kwargs)
+        return
 
     service_logs_dir = "/var/log/upstart"
     myria_log_path = os.path.join(service_logs_dir, "myria.log")
@@ -1561,10 +2782,10 @@ def print_logs(cluster_name, **kwargs):
     container_logs_cmdline = """
 sudo restart myria;
 while read APP_ID APP_NAME; do
-    if [ "\$APP_NAME" = "MyriaDriver" ]; then
-        sudo -E -u {hadoop_user} {yarn_exe} logs -applicationId "\$APP_ID" -appOwner {myria_user} 2>/dev/null
+    if [ "$APP_NAME" = "MyriaDriver" ]; then
+        sudo -E -u {hadoop_user} {yarn_exe} logs -applicationId "$APP_ID" -appOwner {myria_user} 2>/dev/null
     fi
-done < <({yarn_exe} application -list -appStates FINISHED,FAILED,KILLED 2>/dev/null | awk 'FNR>=3 {{print \$1, \$2}}' | sort -rk 1,1 | head -1)
+done < <({yarn_exe} application -list -appStates FINISHED,FAILED,KILLED 2>/dev/null | awk 'FNR>=3 {{print $1, $2}}' | sort -rk 1,1 | head -1)
 """.format(yarn_exe="%s/bin/yarn" % ANSIBLE_GLOBAL_VARS['hadoop_home'],
            hadoop_user=ANSIBLE_GLOBAL_VARS['hadoop_user'],
            myria_user=ANSIBLE_GLOBAL_VARS['myria_user'])
@@ -1593,13 +2814,15 @@ sudo cat {nodemanager_log_path};
     if not kwargs['system_logs'] and not click.confirm("The Myria service must be restarted to view container logs. OK to restart?"):
         sys.exit(1)
     click.secho("Cluster log level is %s...\n" % cluster_log_level, fg='yellow')
+    targets = []
     if master_cmdline:
-        click.secho("\nLogs for coordinator:\n", fg='yellow')
-        exec_command_on_host(coordinator_public_hostname, master_cmdline, kwargs['private_key_file'])
+        targets.append(SSHTarget("coordinator", coordinator_public_hostname, master_cmdline))
     if slave_cmdline:
         for worker_public_hostname in worker_public_hostnames:
-            click.secho("\nLogs for node %d:\n" % node_ids_by_host[worker_public_hostname], fg='yellow')
-            exec_command_on_host(worker_public_hostname, slave_cmdline, kwargs['private_key_file'])
+            targets.append(SSHTarget("node %d" % node_ids_by_host[worker_public_hostname], worker_public_hostname, slave_cmdline))
+    results = exec_command_on_hosts(targets, kwargs['private_key_file'], parallel=kwargs['parallel'])
+    if any(r.returncode != 0 for r in results):
+        echo_exec_summary(results)
 
 
 @run.command('exec')
@@ -1618,30 +2841,116 @@ sudo cat {nodemanager_log_path};
     help="Shell command to execute on all hosts in the cluster")
 @click.option('--node-id', type=int, default=None,
     help="Node ID of the cluster node you want to execute the command on (0 for coordinator, all nodes by default)")
+@click.option('--parallel', type=click.IntRange(1, None), show_default=True, default=SSH_PARALLELISM_DEFAULT,
+    help="Maximum number of nodes to execute the command on concurrently")
+@click.option('--refresh', is_flag=True,
+    help="Query EC2 for the cluster topology instead of using the local cache")
 def exec_command(cluster_name, **kwargs):
-    group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
-    if not group:
+    cluster = get_cached_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'],
+                                         vpc_id=kwargs['vpc_id'], refresh=kwargs['refresh'])
+    if not cluster.group():
         click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
         sys.exit(1)
     if kwargs['node_id'] is not None:
-        public_ip = None
-        for instance in group.instances():
-            if int(instance.tags.get('node-id')) == kwargs['node_id']:
-                public_ip = instance.ip_address
-                break
-        if not public_ip:
+        instance = cluster.instance_by_node_id(kwargs['node_id'])
+        if not (instance and instance.ip_address):
             click.secho("No node found in cluster '%s', region '%s' with node ID %d." % (cluster_name, kwargs['region'], kwargs['node_id']), fg='red')
             sys.exit(1)
-        public_ips = [public_ip]
+        instances = [instance]
     else:
-        public_ips = [instance.ip_address for instance in group.instances()]
-
-    for public_ip in public_ips:
-        click.secho("Executing command on %s" % public_ip, fg='green')
-        ret = exec_command_on_host(public_ip, kwargs['command'], kwargs['private_key_file'])
-        if ret != 0:
-            click.secho("Command exited with error %d on host %s, exiting..." % (ret, public_ip), fg='red')
-            sys.exit(ret)
+        instances = sorted(cluster.instances(), key=lambda i: int(i.tags.get('node-id')))
+
+    targets = [SSHTarget("node %s" % i.tags.get('node-id'), i.ip_address, kwargs['command']) for i in instances]
+    results = exec_command_on_hosts(targets, kwargs['private_key_file'], parallel=kwargs['parallel'])
+    echo_exec_summary(results)
+    failed = [r for r in results if r.returncode != 0]
+    if failed:
+        click.secho("Command failed on %d of %d hosts" % (len(failed), len(results)), fg='red')
+        sys.exit(failed[0].returncode)
+
+
+def get_volume_benchmark_command(directory, size_gb, runtime_secs):
+    """Returns a shell command that runs VOLUME_BENCHMARK_JOBS against a scratch file in `directory`,
+    printing fio's JSON report. Direct I/O keeps the page cache out of the measurements."""
+    job_args = ' '.join("--name=%s --rw=%s --bs=%s --iodepth=%d --stonewall" % job for job in VOLUME_BENCHMARK_JOBS)
+    return ("(command -v fio >/dev/null || (sudo apt-get update -qq && sudo apt-get install -y -qq fio >/dev/null)) && "
+            "sudo mkdir -p {dir} && "
+            "sudo fio --output-format=json --directory={dir} --filename=fio.dat --size={size}G "
+            "--runtime={runtime} --time_based --direct=1 --ioengine=libaio {jobs}; "
+            "status=$?; sudo rm -rf {dir}; exit $status").format(
+                dir=directory, size=size_gb, runtime=runtime_secs, jobs=job_args)
+
+
+def parse_volume_benchmark_output(lines):
+    """Returns [(job name, MB/s, IOPS)] from the fio JSON report in `lines`, skipping any preceding output."""
+    start = next(i for i, line in enumerate(lines) if line.startswith('{'))
+    report = json.loads('\n'.join(lines[start:]))
+    io_patterns = dict((name, rw) for name, rw, _, _ in VOLUME_BENCHMARK_JOBS)
+    results = []
+    for job in report['jobs']:
+        stats = job['write'] if 'write' in io_patterns[job['jobname']] else job['read']
+        # fio reports bandwidth in KiB/s
+        results.append((job['jobname'], stats['bw'] * 1024 / 1e6, stats['iops']))
+    return results
+
+
+# The data directory is the first volume with --volume-layout=separate and the RAID0 array of all
+# data volumes with --volume-layout=raid0, so running this on clusters created with each layout
+# compares the throughput one Myria worker sees under each.
+@run.command('benchmark-volumes')
+@click.argument('cluster_name')
+@click.option('--profile', default=None,
+    help="Boto profile used to launch your cluster")
+@click.option('--region', show_default=True, default=DEFAULTS['region'], type=click.Choice(ALL_REGIONS),
+    help="AWS region your cluster was launched in")
+@click.option('--vpc-id', default=None,
+    help="ID of the VPC (Virtual Private Cloud) used for your EC2 instances")
+@click.option('--private-key-file', callback=default_key_file,
+    help="Private key file for your EC2 key pair [default: %s]" % ("%s/.ssh/%s-myria_%s.pem" % (HOME, USER, DEFAULTS['region'])))
+@click.option('--node-id', type=int, show_default=True, default=1,
+    help="Node ID of the cluster node to benchmark")
+@click.option('--size-gb', type=click.IntRange(1, None), show_default=True, default=4,
+    help="Size of the scratch file each benchmark job reads or writes")
+@click.option('--runtime-secs', type=click.IntRange(1, None), show_default=True, default=30,
+    help="Duration of each benchmark job")
+@click.option('--refresh', is_flag=True,
+    help="Query EC2 for the cluster topology instead of using the local cache")
+def benchmark_volumes(cluster_name, **kwargs):
+    cluster = get_cached_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'],
+                                         vpc_id=kwargs['vpc_id'], refresh=kwargs['refresh'])
+    if not cluster.group():
+        click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
+        sys.exit(1)
+    instance = cluster.instance_by_node_id(kwargs['node_id'])
+    if not (instance and instance.ip_address):
+        click.secho("No node found in cluster '%s', region '%s' with node ID %d." % (cluster_name, kwargs['region'], kwargs['node_id']), fg='red')
+        sys.exit(1)
+    md = cluster.metadata()
+    layout = md.get('volume_layout') or 'separate'
+    if md['storage_type'] == 'local':
+        volume_count = EPHEMERAL_VOLUMES_BY_INSTANCE_TYPE.get(md['instance_type'], 0)
+        volume_type = 'local'
+    else:
+        volume_count = md['data_volume_count']
+        volume_type = md['data_volume_type']
+
+    click.secho("Benchmarking data directory on node %d (%s layout of %d %s volumes)..." % (
+        kwargs['node_id'], layout, volume_count, volume_type), fg='yellow')
+    cmd = get_volume_benchmark_command(os.path.join(ANSIBLE_GLOBAL_VARS['default_data_dir'], "io-benchmark"),
+                                       kwargs['size_gb'], kwargs['runtime_secs'])
+    lines = []
+    target = SSHTarget("node %d" % kwargs['node_id'], instance.ip_address, cmd)
+    result = exec_command_on_hosts([target], kwargs['private_key_file'], on_line=lambda t, line: lines.append(line))[0]
+    if result.returncode != 0:
+        click.secho('\n'.join(lines), fg='red')
+        click.secho("Benchmark failed on node %d" % kwargs['node_id'], fg='red')
+        sys.exit(result.returncode)
+
+    format_str = "{: <10} {: <8} {: <6} {: <18} {: >10} {: >10}"
+    click.echo(format_str.format('LAYOUT', 'VOLUMES', 'TYPE', 'JOB', 'MB/s', 'IOPS'))
+    click.echo(format_str.format('------', '-------', '----', '---', '----', '----'))
+    for name, mb_per_sec, iops in parse_volume_benchmark_output(lines):
+        click.echo(format_str.format(layout, volume_count, volume_type, name, "%.1f" % mb_per_sec, "%.0f" % iops))
 
 
 @run.command('destroy')
@@ -1683,7 +2992,8 @@ def stop_cluster(cluster_name, **kwargs):
     try:
         if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id'], verbosity=verbosity):
             sys.exit(1)
-        group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        group = cluster.group()
         if not group:
             click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
             sys.exit(1)
@@ -1693,26 +3003,22 @@ def stop_cluster(cluster_name, **kwargs):
         if group.tags.get('spot-price'):
             click.secho("Cluster '%s' has spot instances and cannot be stopped." % cluster_name, fg='red')
             sys.exit(1)
-        instance_ids = [instance.id for instance in group.instances()]
+        instance_ids = [instance.id for instance in cluster.instances()]
         if verbosity > 0:
             click.echo("Stopping instances %s" % ', '.join(instance_ids))
-        ec2 = boto.ec2.connect_to_region(kwargs['region'], profile_name=kwargs['profile'])
+        ec2 = cluster.ec2
         ec2.stop_instances(instance_ids=instance_ids)
-        while True:
-            stopped_count = 0
-            for instance in group.instances():
-                instance.update(validate=True)
-                if instance.state == "stopped":
-                    stopped_count += 1
-            if stopped_count == len(group.instances()):
-                # all instances stopped, so break out of while loop
-                break
-            if verbosity > 0:
-                click.secho("Not all instances stopped (%d/%d), waiting 60 seconds..." % (
-                    stopped_count, len(group.instances())), fg='yellow')
-            sleep(60)
+        def instances_stopped():
+            # fetch the state of all instances in a single request
+            instances = ec2.get_only_instances(instance_ids=instance_ids)
+            stopped_count = len([i for i in instances if i.state == "stopped"])
+            return (stopped_count == len(instance_ids),
+                    "Not all instances stopped (%d/%d)" % (stopped_count, len(instance_ids)))
+        wait_until(instances_stopped, 'instances_stopped', verbosity=verbosity)
+        cluster.invalidate(group=False)
         # mark cluster as stopped
         group.add_tags({'state': "stopped"})
+        cluster.save_cache()
     except (KeyboardInterrupt, Exception) as e:
         if verbosity > 0:
             click.secho(str(e), fg='red')
@@ -1743,20 +3049,25 @@ You can start this cluster again by running
     help="AWS region your cluster was launched in")
 @click.option('--vpc-id', default=None,
     help="ID of the VPC (Virtual Private Cloud) used for your EC2 instances")
+@click.option('--timings', is_flag=True,
+    help="Print a summary of time spent in each phase when finished")
 def start_cluster(cluster_name, **kwargs):
     verbosity = 0 if kwargs['silent'] else 1
+    begin_trace('start', cluster_name, timings=kwargs.pop('timings'))
     try:
         if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id'], verbosity=verbosity):
             sys.exit(1)
-        group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        group = cluster.group()
         if not group:
             click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
             sys.exit(1)
-        instance_ids = [instance.id for instance in group.instances()]
+        instance_ids = [instance.id for instance in cluster.instances()]
         if verbosity > 0:
             click.echo("Starting instances %s" % ', '.join(instance_ids))
-        ec2 = boto.ec2.connect_to_region(kwargs['region'], profile_name=kwargs['profile'])
-        ec2.start_instances(instance_ids=instance_ids)
+        cluster.ec2.start_instances(instance_ids=instance_ids)
+        # public hostnames change when instances are restarted
+        cluster.invalidate(group=False)
         if verbosity > 0:
             click.secho("Waiting for started instances to become available...", fg='yellow')
         wait_for_all_instances_reachable(
@@ -1771,6 +3082,7 @@ def start_cluster(cluster_name, **kwargs):
             cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
         if not coordinator_public_hostname:
             raise ValueError("Couldn't resolve coordinator public DNS for cluster '%s'" % cluster_name)
+        cluster.save_cache()
     except (KeyboardInterrupt, Exception) as e:
         if verbosity > 0:
             click.secho(str(e), fg='red')
@@ -1811,30 +3123,49 @@ New public hostname of coordinator:
     help="EC2 key pair used to launch AMI builder instance")
 @click.option('--private-key-file', callback=default_key_file_from_key_pair,
     help="Private key file for your EC2 key pair [default: %s]" % ("%s/.ssh/%s-myria_%s.pem" % (HOME, USER, DEFAULTS['region'])))
+@click.option('--timings', is_flag=True,
+    help="Print a summary of time spent in each phase when finished")
+@click.option('--build-jar-locally', is_flag=True,
+    help="Build the Myria jar on this machine (requires a JDK) and upload it, instead of building it on the coordinator")
 def update_cluster(cluster_name, **kwargs):
     verbosity = 3 if kwargs['verbose'] else 0 if kwargs['silent'] else 1
+    begin_trace('update', cluster_name, timings=kwargs.pop('timings'))
+    build_jar_locally = kwargs.pop('build_jar_locally')
     try:
         if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id'], verbosity=verbosity):
             sys.exit(1)
-        group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        group = cluster.group()
         if not group:
             click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
             sys.exit(1)
 
         extra_vars = dict((k.upper(), v) for k, v in kwargs.iteritems() if v is not None)
         extra_vars.update(CLUSTER_NAME=cluster_name)
+        # recompute the Postgres profile in case its sizing rules changed since the cluster was created
+        md = get_dict_from_cluster_metadata(group)
+        postgres_profile = get_postgres_profile(md['node_mem_gb'], md['workers_per_node'], md['worker_vcores'])
+        extra_vars.update((k.upper(), v) for k, v in postgres_profile.iteritems())
+        extra_vars.update(POSTGRES_MODE=get_postgres_mode(md))
+        if extra_vars['POSTGRES_MODE'] == 'bulk-load':
+            extra_vars.update(POSTGRES_BULK_LOAD_EXPIRES=md['postgres_bulk_load_expires'])
+        if build_jar_locally:
+            commit, jar_file = build_myria_jar(verbosity=verbosity)
+            extra_vars.update(MYRIA_COMMIT=commit, MYRIA_JAR_FILE=jar_file)
 
         if verbosity > 1:
             for k, v in extra_vars.iteritems():
                 click.echo("%s: %s" % (k, v))
 
         # mark cluster as updating
-        group.add_tags({'state': "updating"})
+        group_tags = dict(get_cluster_metadata_tags_from_dict(postgres_profile))
+        group_tags.update(state="updating")
+        group.add_tags(group_tags)
 
         # run remote playbook to update software on EC2 instances
         click.echo("Updating Myria software on cluster...")
         if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars,
-                            tags=['update'], verbosity=verbosity):
+                            tags=['update'], instances=cluster.instances(), verbosity=verbosity):
             raise ValueError("Failed to execute playbook")
         wait_for_all_workers_online(cluster_name, kwargs['region'], profile=kwargs['profile'],
                                     vpc_id=kwargs['vpc_id'], verbosity=verbosity)
@@ -1854,6 +3185,78 @@ There was a problem updating Myria software.
         sys.exit(1)
 
 
+@run.command('bulk-load')
+@click.argument('cluster_name')
+@click.option('--silent', is_flag=True)
+@click.option('--verbose', is_flag=True)
+@click.option('--profile', default=None,
+    help="Boto profile used to launch your cluster")
+@click.option('--region', show_default=True, default=DEFAULTS['region'], type=click.Choice(ALL_REGIONS),
+    help="AWS region your cluster was launched in")
+@click.option('--vpc-id', default=None,
+    help="ID of the VPC (Virtual Private Cloud) used for your EC2 instances")
+@click.option('--key-pair', show_default=True, default=DEFAULTS['key_pair'],
+    help="EC2 key pair used to launch AMI builder instance")
+@click.option('--private-key-file', callback=default_key_file_from_key_pair,
+    help="Private key file for your EC2 key pair [default: %s]" % ("%s/.ssh/%s-myria_%s.pem" % (HOME, USER, DEFAULTS['region'])))
+@click.option('--off', is_flag=True,
+    help="Switch Postgres back to its normal settings")
+@click.option('--revert-after-hours', type=click.IntRange(1, None), show_default=True, default=BULK_LOAD_REVERT_HOURS_DEFAULT,
+    help="Hours after which Postgres switches back to its normal settings on its own")
+@click.option('--timings', is_flag=True,
+    help="Print a summary of time spent in each phase when finished")
+def bulk_load(cluster_name, **kwargs):
+    verbosity = 3 if kwargs['verbose'] else 0 if kwargs['silent'] else 1
+    begin_trace('bulk-load', cluster_name, timings=kwargs.pop('timings'))
+    try:
+        if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id'], verbosity=verbosity):
+            sys.exit(1)
+        cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        group = cluster.group()
+        if not group:
+            click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
+            sys.exit(1)
+
+        md = get_dict_from_cluster_metadata(group)
+        if kwargs['off']:
+            mode = dict(postgres_mode='normal')
+        else:
+            expires = datetime.utcnow() + timedelta(hours=kwargs['revert_after_hours'])
+            mode = dict(postgres_mode='bulk-load', postgres_bulk_load_expires=expires.strftime(BULK_LOAD_EXPIRES_FORMAT))
+        extra_vars = dict((k.upper(), v) for k, v in kwargs.iteritems() if v is not None)
+        extra_vars.update(CLUSTER_NAME=cluster_name)
+        # the normal settings are the node's Postgres profile
+        extra_vars.update((k.upper(), v) for k, v in md.iteritems() if k.startswith('postgres_') and v is not None)
+        extra_vars.update((k.upper(), v) for k, v in mode.iteritems())
+
+        if verbosity > 1:
+            for k, v in extra_vars.iteritems():
+                click.echo("%s: %s" % (k, v))
+
+        # restarts Postgres on one node at a time; there are no retries, since a failed node stops the rollout
+        # and rerunning the command resumes it (nodes already switched are left alone)
+        click.echo("Switching Postgres to %s settings on cluster..." % mode['postgres_mode'])
+        if not run_playbook("bulk-load.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=['bulk-load'],
+                            instances=cluster.instances(), max_retries=0, verbosity=verbosity):
+            raise ValueError("Failed to execute playbook")
+        group.add_tags(dict(get_cluster_metadata_tags_from_dict(mode)))
+        if kwargs['off']:
+            click.secho("Postgres switched back to normal settings.", fg='green')
+        else:
+            click.secho("Postgres switched to bulk-load settings until %s (UTC). Run `%s bulk-load %s --off` when your load is done." % (
+                expires.strftime("%Y-%m-%d %H:%M"), SCRIPT_NAME, cluster_name), fg='green')
+
+    except (KeyboardInterrupt, Exception) as e:
+        if verbosity > 0:
+            click.secho(str(e), fg='red')
+        if verbosity > 1:
+            click.secho(traceback.format_exc(), fg='red')
+        click.secho("""
+There was a problem switching Postgres settings. Rerun this command to resume.
+""" + ("See previous error messages for details." if kwargs['verbose'] else "Rerun with the --verbose option for details."), fg='red')
+        sys.exit(1)
+
+
 def validate_list_options(ctx, param, value):
     if value is True:
         if ctx.params.get('coordinator') or ctx.params.get('workers'):
@@ -1877,13 +3280,17 @@ def validate_list_options(ctx, param, value):
     help="Output public DNS name of coordinator node")
 @click.option('--workers', is_flag=True, callback=validate_list_options,
     help="Output public DNS names of worker nodes")
+@click.option('--refresh', is_flag=True,
+    help="Query EC2 for the cluster topology instead of using the local cache")
 def describe_cluster(cluster_name, **kwargs):
-    if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id']):
-        sys.exit(1)
+    cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+    # only go to EC2 (and validate our settings for it) if the cached topology is missing or stale
+    if kwargs['refresh'] or not cluster.load_cache():
+        if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id']):
+            sys.exit(1)
+        cluster.save_cache()
     if kwargs['metadata']:
-        group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
-        md = get_dict_from_cluster_metadata(group)
-        print(json.dumps(md, sort_keys=True, indent=4, separators=(',', ': ')))
+        print(json.dumps(cluster.metadata(), sort_keys=True, indent=4, separators=(',', ': ')))
     elif kwargs['coordinator']:
         print(get_coordinator_public_hostname(
             cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id']))
@@ -1891,14 +3298,13 @@ def describe_cluster(cluster_name, **kwargs):
         print('\n'.join(get_worker_public_hostnames(
             cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])))
     else:
-        group = get_security_group_for_cluster(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
-        if not group:
+        if not cluster.group():
             click.secho("No cluster with name '%s' exists in region '%s'." % (cluster_name, kwargs['region']), fg='red')
             sys.exit(1)
         format_str = "{: <7} {: <10} {: <50}"
         print(format_str.format('NODE_ID', 'WORKER_IDS', 'HOST'))
         print(format_str.format('-------', '----------', '----'))
-        instances = sorted(group.instances(), key=lambda i: int(i.tags.get('node-id')))
+        instances = sorted(cluster.instances(), key=lambda i: int(i.tags.get('node-id')))
         for instance in instances:
             print(format_str.format(int(instance.tags.get('node-id')), instance.tags.get('worker-id'), instance.public_dns_name))
 
@@ -1911,27 +3317,46 @@ def describe_cluster(cluster_name, **kwargs):
 @click.option('--vpc-id', default=None,
     help="ID of the VPC (Virtual Private Cloud) used for your EC2 instances")
 def list_clusters(**kwargs):
-    for region in kwargs['region']:
+    def list_region(region):
         if not validate_aws_settings(region, kwargs['profile'], kwargs['vpc_id']):
-            sys.exit(1)
-        ec2 = boto.ec2.connect_to_region(region, profile_name=kwargs['profile'])
-        myria_groups = ec2.get_all_security_groups(filters={'tag:app': "myria"})
-        groups = myria_groups
+            return region, None
+        ec2 = get_ec2_connection(region, profile=kwargs['profile'])
+        filters = {'tag:app': "myria"}
         if kwargs['vpc_id']:
-            groups_in_vpc = ec2.get_all_security_groups(filters={'vpc-id': kwargs['vpc_id']})
-            groups_in_vpc_ids = [g.id for g in groups_in_vpc]
-            # In the EC2 API, filters can only express OR,
-            # so we have to implement AND by intersecting results for each filter.
-            groups = [g for g in myria_groups if g.id in groups_in_vpc_ids]
-        format_str = "{: <15} {: <20} {: <5} {: <50} {: <10} {: <20}"
-        if groups:
+            filters['vpc-id'] = kwargs['vpc_id']
+        groups = ec2.get_all_security_groups(filters=filters)
+        if not groups:
+            return region, []
+        # fetch the instances of all clusters in the region at once, rather than once per cluster
+        instances_by_group = dict((g.id, []) for g in groups)
+        instances = ec2.get_only_instances(filters={
+            'tag:app': "myria",
+            'instance-state-name': ['pending', 'running', 'stopping', 'stopped']})
+        for instance in instances:
+            for g in instance.groups:
+                if g.id in instances_by_group:
+                    instances_by_group[g.id].append(instance)
+        rows = []
+        for group in groups:
+            group_instances = instances_by_group[group.id]
+            coordinators = [i for i in group_instances if i.tags.get('cluster-role') == "coordinator"]
+            coordinator = coordinators[0].public_dns_name if coordinators else None
+            rows.append((region, group.name, len(group_instances), coordinator,
+                         group.tags.get('state', "unknown"), group.tags.get('iam-user', "unknown")))
+        return region, rows
+
+    format_str = "{: <15} {: <20} {: <5} {: <50} {: <10} {: <20}"
+    header_printed = False
+    for region, rows in imap_regions(list_region, kwargs['region']):
+        if rows is None:
+            sys.exit(1)
+        if rows and not header_printed:
             print(format_str.format('REGION', 'CLUSTER', 'NODES', 'COORDINATOR', 'STATE', 'OWNER'))
             print(format_str.format('------', '-------', '-----', '-----------', '-----', '-----'))
-        for group in groups:
-            coordinator = get_coordinator_public_hostname(
-                group.name, region, profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
-            print(format_str.format(region, group.name, len(group.instances()), coordinator,
-                  group.tags.get('state', "unknown"), group.tags.get('iam-user', "unknown")))
+            header_printed = True
+        for row in sorted(rows, key=itemgetter(1)):
+            print(format_str.format(*row))
+        sys.stdout.flush()
 
 
 def validate_resize_command(ctx, param, value):
@@ -1959,8 +3384,11 @@ def validate_resize_command(ctx, param, value):
     help="New number of nodes in this cluster")
 @click.option('--increment', type=click.IntRange(1, None), default=None, callback=validate_resize_command,
     help="Number of nodes to add to this cluster")
+@click.option('--timings', is_flag=True,
+    help="Print a summary of time spent in each phase when finished")
 def resize_cluster(cluster_name, **kwargs):
     verbosity = 3 if kwargs['verbose'] else 0 if kwargs['silent'] else 1
+    begin_trace('resize', cluster_name, timings=kwargs.pop('timings'))
     instances = None
     try:
         if not validate_aws_settings(kwargs['region'], kwargs['profile'], kwargs['vpc_id'], verbosity=verbosity):
@@ -1977,6 +3405,8 @@ def resize_cluster(cluster_name, **kwargs):
         # save target cluster size before it's overwritten by cluster metadata
         target_cluster_size = kwargs['cluster_size'] if kwargs.get('cluster_size') else md['cluster_size'] + kwargs['increment']
         kwargs.update(md)
+        # new nodes join a bulk load in progress, and revert with the others
+        kwargs.update(postgres_mode=get_postgres_mode(md))
         current_cluster_size = kwargs['cluster_size']
         if target_cluster_size <= current_cluster_size:
             click.secho("You must specify a target cluster size greater than the current cluster size (%d)!" % current_cluster_size, fg='red')
@@ -1991,8 +3421,21 @@ def resize_cluster(cluster_name, **kwargs):
         ephemeral_volumes = all_volumes if kwargs['storage_type'] == 'local' else all_volumes[0:-kwargs['data_volume_count']]
         ebs_volumes = [] if kwargs['storage_type'] == 'local' else all_volumes[-kwargs['data_volume_count']:]
 
-        # launch the new instances
-        instances = launch_cluster(cluster_name, device_mapping=device_mapping, verbosity=verbosity, **kwargs)
+        extra_vars = dict((k.upper(), v) for k, v in kwargs.iteritems() if v is not None)
+        extra_vars.update(CLUSTER_NAME=cluster_name)
+        extra_vars.update(ALL_VOLUMES=all_volumes)
+        extra_vars.update(EBS_VOLUMES=ebs_volumes)
+        extra_vars.update(EPHEMERAL_VOLUMES=ephemeral_volumes)
+        extra_vars.update(ARTIFACT_CACHE_WAIT_SECS=ARTIFACT_CACHE_RESIZE_WAIT_SECS)
+
+        if verbosity > 2:
+            click.echo(json.dumps(extra_vars))
+
+        # launch the new instances, provisioning each one as soon as it is reachable
+        tags = ['provision', 'configure'] if kwargs['unprovisioned'] else ['configure']
+        pipeline = ProvisioningPipeline(kwargs['private_key_file'], extra_vars, tags, verbosity=verbosity)
+        instances = launch_cluster(cluster_name, device_mapping=device_mapping, on_reachable=pipeline.submit,
+                                   on_error=pipeline.cancel, verbosity=verbosity, **kwargs)
     except (KeyboardInterrupt, Exception) as e:
         if verbosity > 0:
             click.secho(str(e), fg='red')
@@ -2004,21 +3447,8 @@ def resize_cluster(cluster_name, **kwargs):
 
     instance_ids = [i.id for i in instances]
     try:
-        ec2 = boto.ec2.connect_to_region(kwargs['region'], profile_name=kwargs['profile'])
-
-        # run remote playbook to provision EC2 instances
-        extra_vars = dict((k.upper(), v) for k, v in kwargs.iteritems() if v is not None)
-        extra_vars.update(CLUSTER_NAME=cluster_name)
-        extra_vars.update(ALL_VOLUMES=all_volumes)
-        extra_vars.update(EBS_VOLUMES=ebs_volumes)
-        extra_vars.update(EPHEMERAL_VOLUMES=ephemeral_volumes)
-
-        if verbosity > 2:
-            click.echo(json.dumps(extra_vars))
-
-        # provision new instances
-        tags = ['provision', 'configure'] if kwargs['unprovisioned'] else ['configure']
-        if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=tags, limit_hosts=[i.ip_address for i in instances], verbosity=verbosity):
+        # finish provisioning new instances
+        if not pipeline.finish():
             click.secho("Failed to provision new instances, terminating...", fg='red')
             if verbosity > 1:
                 click.echo("Terminating instances %s" % ', '.join(instance_ids))
@@ -2027,7 +3457,11 @@ def resize_cluster(cluster_name, **kwargs):
 
         # update configuration on coordinator
         tags = ['update-workers']
-        if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=tags, verbosity=verbosity):
+        # new instances may have been looked up before they had public IPs
+        cluster = get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id'])
+        cluster.invalidate(group=False)
+        if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=tags,
+                            instances=cluster.instances(), verbosity=verbosity):
             raise ValueError("Failed to configure cluster for new instances")
 
         # wait for all workers to become available
@@ -2038,6 +3472,7 @@ def resize_cluster(cluster_name, **kwargs):
 
         # update cluster metadata and state
         group.add_tags({'cluster-size': target_cluster_size, 'state': "running"})
+        get_cluster_context(cluster_name, kwargs['region'], profile=kwargs['profile'], vpc_id=kwargs['vpc_id']).save_cache()
 
     except MyriaError:
         click.secho("""
@@ -2051,6 +3486,7 @@ Please refer to the error message above for diagnosis. Exiting (not terminating
         if verbosity > 1:
             click.secho(traceback.format_exc(), fg='red')
         click.secho("Unexpected error, terminating new instances...", fg='red')
+        pipeline.cancel()
         if verbosity > 1:
             click.echo("Terminating instances %s" % ', '.join(instance_ids))
         terminate_instances(kwargs['region'], instance_ids, profile=kwargs['profile'])
@@ -2099,20 +3535,88 @@ def validate_description(ctx, param, value):
     return value or ctx.params.get('ami_name')
 
 
+@traced("look up base image")
+def get_latest_myria_image(region, virt_type, profile=None):
+    """Returns our most recently created Myria AMI in `region` with virtualization type 'hvm' or 'pv'.
+
+    Falls back to the default provisioned Myria AMI if we have not created any yet, and returns None if there is none.
+    """
+    ec2 = get_ec2_connection(region, profile=profile)
+    images = ec2.get_all_images(owners=['self'], filters={
+        'tag:app': "myria",
+        'virtualization-type': 'paravirtual' if virt_type == 'pv' else 'hvm',
+        'state': 'available'})
+    if images:
+        return max(images, key=attrgetter('creationDate'))
+    default_ami_ids = DEFAULT_PROVISIONED_PV_AMI_IDS if virt_type == 'pv' else DEFAULT_PROVISIONED_HVM_AMI_IDS
+    return ec2.get_image(default_ami_ids[region]) if region in default_ami_ids else None
+
+
 def wait_until_image_available(ami_id, region, profile=None, verbosity=0):
-    ec2 = boto.ec2.connect_to_region(region, profile_name=profile)
+    ec2 = get_ec2_connection(region, profile=profile)
     image = ec2.get_image(ami_id)
     if verbosity > 0:
         click.secho("Waiting for AMI %s in region '%s' to become available..." % (ami_id, region), fg='yellow')
-    while image.state == 'pending':
-        sleep(5)
-        image.update()
+    def image_available():
+        if image.state == 'pending':
+            image.update()
+        return image.state != 'pending', None
+    wait_until(image_available, 'image_available', verbosity=verbosity)
     if image.state == 'available':
         return
     else:
         raise ValueError("Unexpected image status '%s' for AMI %s in region '%s'" % (image.state, ami_id, region))
 
 
+def copy_image_to_regions(ami_id, source_region, regions, name, description, on_available, profile=None, verbosity=0):
+    """Copies AMI `ami_id` from `source_region` to each of `regions` at once.
+
+    All copies are tracked by a single waiter, which calls `on_available(region, image)` for
+    each copy as soon as it becomes available. Returns {region: AMI ID of the copy}.
+    """
+    def start_copy(region):
+        ec2 = get_ec2_connection(region, profile=profile)
+        return region, ec2.copy_image(source_region, ami_id, name=name, description=description).image_id, time()
+
+    copy_starts = {}
+    pending = {}
+    for region, copy_id, start in imap_regions(start_copy, regions):
+        if verbosity > 0:
+            click.echo("Copying AMI %s to region '%s' as %s..." % (ami_id, region, copy_id))
+        copy_starts[region] = start
+        pending[region] = copy_id
+    image_ids_by_region = dict(pending)
+
+    def copies_available():
+        for region, copy_id in sorted(pending.items()):
+            ec2 = get_ec2_connection(region, profile=profile)
+            try:
+                images = ec2.get_all_images(image_ids=[copy_id])
+            except ec2.ResponseError as e:
+                # new copies may not be visible to DescribeImages yet
+                if e.code == 'InvalidAMIID.NotFound':
+                    continue
+                else:
+                    raise
+            state = images[0].state if images else 'pending'
+            if state == 'pending':
+                continue
+            if state != 'available':
+                raise ValueError("Unexpected image status '%s' for AMI %s in region '%s'" % (state, copy_id, region))
+            elapsed = time() - copy_starts[region]
+            TRACER.add("copy image to %s" % region, copy_starts[region], elapsed, category="wait", args=dict(ami_id=copy_id))
+            if verbosity > 0:
+                click.secho("AMI %s in region '%s' became available after %.1f seconds" % (copy_id, region, elapsed), fg='green')
+            on_available(region, images[0])
+            del pending[region]
+        return not pending, "%d of %d copies available, waiting for %s" % (
+            len(regions) - len(pending), len(regions), ', '.join(sorted(pending)))
+
+    if regions:
+        wait_until(copies_available, 'image_copies', verbosity=verbosity)
+    return image_ids_by_region
+
+
 @run.command('create-image')
 @click.argument('ami_name')
 @click.option('--verbose', is_flag=True, callback=validate_console_logging)
@@ -2147,8 +3651,13 @@ def wait_until_image_available(ami_id, region, profile=None, verbosity=0):
     help="Description of new AMI (\"Name\" in AWS console)")
 @click.option('--copy-to-region', default=ALL_REGIONS, multiple=True, type=click.Choice(ALL_REGIONS),
     help="Region to copy new AMI (can be specified multiple times)")
+@click.option('--incremental', is_flag=True,
+    help="Build on our latest Myria AMI (or --base-ami-id) and only update Myria software, instead of provisioning from scratch")
+@click.option('--timings', is_flag=True,
+    help="Print a summary of time spent in each phase when finished")
 def create_image(ami_name, **kwargs):
     verbosity = 3 if kwargs['verbose'] else 0 if kwargs['silent'] else 1
+    begin_trace('create-image', ami_name, timings=kwargs.pop('timings'))
     vpc_id = kwargs.get('vpc_id')
     iam_user = get_iam_user(kwargs['region'], profile=kwargs['profile'], verbosity=verbosity)
     if not validate_aws_settings(kwargs['region'], kwargs['profile'], vpc_id, verbosity=verbosity):
@@ -2157,12 +3666,32 @@ def create_image(ami_name, **kwargs):
     if not create_key_pair_and_private_key_file(kwargs['key_pair'], kwargs['private_key_file'], kwargs['region'],
                                                 profile=kwargs['profile'], verbosity=verbosity):
         sys.exit(1)
+    # Incremental builds start from an existing Myria AMI, so they only need the `update` tasks.
+    # Each image records the stock AMI its lineage started from and how many incremental builds followed.
+    lineage_tags = {'root-image': kwargs['base_ami_id'], 'image-generation': "0"}
+    if kwargs['incremental']:
+        if kwargs.get('explicit_base_ami_id'):
+            base_image = get_ec2_connection(kwargs['region'], profile=kwargs['profile']).get_image(kwargs['base_ami_id'])
+        else:
+            virt_type = kwargs['virt_type'] or (
+                'pv' if instance_type_family_from_instance_type(kwargs['instance_type']) in PV_INSTANCE_TYPE_FAMILIES else 'hvm')
+            base_image = get_latest_myria_image(kwargs['region'], virt_type, profile=kwargs['profile'])
+        if base_image is None:
+            click.secho("No Myria AMI found in region '%s' to build on." % kwargs['region'], fg='red')
+            sys.exit(1)
+        kwargs['base_ami_id'] = base_image.id
+        lineage_tags = {
+            'root-image': base_image.tags.get('root-image', base_image.tags.get('base-image', base_image.id)),
+            'image-generation': str(int(base_image.tags.get('image-generation', 0)) + 1),
+        }
+        if verbosity > 0:
+            click.echo("Building on AMI '%s' (ID: %s)..." % (base_image.name, base_image.id))
     # dedupe image creation region from copy regions
     kwargs['copy_to_region'] = tuple([r for r in kwargs['copy_to_region'] if r != kwargs['region']])
     # abort or deregister if AMI with the same name already exists
     regions = kwargs['copy_to_region'] + (kwargs['region'],)
     for region in regions:
-        ec2 = boto.ec2.connect_to_region(region, profile_name=kwargs['profile'])
+        ec2 = get_ec2_connection(region, profile=kwargs['profile'])
         images = ec2.get_all_images(filters={'name': ami_name})
         if images:
             if kwargs['overwrite']:
@@ -2186,8 +3715,10 @@ run this command with the `--overwrite` option.
             click.echo("Destroying old AMI builder instance...")
             terminate_cluster(ami_name, kwargs['region'], profile=kwargs['profile'], vpc_id=vpc_id)
         else:
-            if group.instances():
-                instance_id = group.instances()[0].id
+            instance_id = None
+            builder_instances = get_cluster_context(ami_name, kwargs['region'], profile=kwargs['profile'], vpc_id=vpc_id).instances()
+            if builder_instances:
+                instance_id = builder_instances[0].id
             instance_str = "first terminate instance '{instance_id}' and then " if instance_id else ""
             click.secho("""
 A builder instance for the AMI name '{ami_name}' already exists in the '{region}' region.
@@ -2217,40 +3748,44 @@ instance_str + """delete security group '{ami_name}' (ID: {group_id}) from the A
 
         # run remote playbook to provision EC2 instances
         click.echo("Provisioning AMI builder instance...")
-        if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=['provision'], verbosity=verbosity):
+        if kwargs['incremental']:
+            tags, skip_tags = ['update'], ['restart']
+        else:
+            tags, skip_tags = ['provision'], []
+        if not run_playbook("remote.yml", kwargs['private_key_file'], extra_vars=extra_vars, tags=tags, skip_tags=skip_tags,
+                            verbosity=verbosity):
             click.secho("Unexpected error provisioning AMI builder instance, destroying instance...", fg='red')
             terminate_cluster(ami_name, kwargs['region'], profile=kwargs['profile'], vpc_id=vpc_id)
             sys.exit(1)
 
         click.echo("Bundling image...")
         image_ids_by_region = {}
-        group = get_security_group_for_cluster(ami_name, kwargs['region'], profile=kwargs['profile'], vpc_id=vpc_id)
-        instance_id = group.instances()[0].id
-        ec2 = boto.ec2.connect_to_region(kwargs['region'], profile_name=kwargs['profile'])
+        instance_id = get_cluster_context(ami_name, kwargs['region'], profile=kwargs['profile'], vpc_id=vpc_id).instances()[0].id
+        ec2 = get_ec2_connection(kwargs['region'], profile=kwargs['profile'])
         ami_id = ec2.create_image(instance_id=instance_id, name=ami_name, description=kwargs['description'])
         image_ids_by_region[kwargs['region']] = ami_id
-        wait_until_image_available(ami_id, kwargs['region'], profile=kwargs['profile'], verbosity=verbosity)
-        click.echo("Copying image to other regions...")
-        for copy_region in kwargs['copy_to_region']:
-            ec2 = boto.ec2.connect_to_region(copy_region, profile_name=kwargs['profile'])
-            copy_image = ec2.copy_image(kwargs['region'], ami_id, name=ami_name, description=kwargs['description'])
-            image_ids_by_region[copy_region] = copy_image.image_id
-            wait_until_image_available(copy_image.image_id, copy_region, profile=kwargs['profile'], verbosity=verbosity)
-        click.echo("Tagging images...")
-        for region, ami_id in image_ids_by_region.iteritems():
-            ec2 = boto.ec2.connect_to_region(region, profile_name=kwargs['profile'])
-            image = ec2.get_image(ami_id)
-            tags = {
-                'Name': kwargs['description'],
-                'base-image': kwargs['base_ami_id'],
-                'app': "myria",
-            }
-            if iam_user:
-                tags.update({'user:Name': iam_user})
+        tags = {
+            'Name': kwargs['description'],
+            'base-image': kwargs['base_ami_id'],
+            'app': "myria",
+        }
+        tags.update(lineage_tags)
+        if iam_user:
+            tags.update({'user:Name': iam_user})
+
+        # tag (and publish) each image as soon as it is available, rather than after all copies finish
+        def publish_image(region, image):
             image.add_tags(tags)
             if not kwargs['private']:
                 # make AMI public
                 image.set_launch_permissions(group_names='all')
+
+        wait_until_image_available(ami_id, kwargs['region'], profile=kwargs['profile'], verbosity=verbosity)
+        publish_image(kwargs['region'], get_ec2_connection(kwargs['region'], profile=kwargs['profile']).get_image(ami_id))
+        click.echo("Copying image to other regions...")
+        image_ids_by_region.update(copy_image_to_regions(ami_id, kwargs['region'], kwargs['copy_to_region'], ami_name,
+                                                         kwargs['description'], publish_image,
+                                                         profile=kwargs['profile'], verbosity=verbosity))
     except (KeyboardInterrupt, Exception) as e:
         if verbosity > 0:
             click.secho(str(e), fg='red')
@@ -2294,26 +3829,35 @@ def validate_vpc_ids(ctx, param, value):
 @click.option('--vpc-id', default=None, callback=validate_vpc_ids,
     help="ID of the VPC (Virtual Private Cloud) in which AMI was created (can be specified multiple times, in same order as regions)")
 def delete_image(ami_name, **kwargs):
+    verbosity = 1
     regions = kwargs['region']
+
+    def delete_region_image(region_vpc):
+        region, vpc_id = region_vpc
+        if not validate_aws_settings(region, kwargs['profile'], vpc_id):
+            return region, False, None
+        ec2 = get_ec2_connection(region, profile=kwargs['profile'])
+        # In the EC2 API, filters can only express OR,
+        # so we have to implement AND by intersecting results for each filter.
+        if vpc_id:
+            images_by_vpc = ec2.get_all_images(filters={'vpc-id': vpc_id})
+            images = [img for img in images_by_vpc if img.name == ami_name]
+        else:
+            images = ec2.get_all_images(filters={'name': ami_name})
+        if not images:
+            return region, True, None
+        images[0].deregister(delete_snapshot=True)
+        # TODO: wait here for image to become unavailable
+        return region, True, images[0].id
+
     if click.confirm("Are you sure you want to delete the AMI '%s' in the %s regions?" % (ami_name, ', '.join(regions))):
         try:
-            for i, region in enumerate(regions):
-                vpc_id = kwargs['vpc_id'][i] if kwargs['vpc_id'] else None
-                if not validate_aws_settings(region, kwargs['profile'], vpc_id):
+            region_vpcs = [(region, kwargs['vpc_id'][i] if kwargs['vpc_id'] else None) for i, region in enumerate(regions)]
+            for region, valid, ami_id in imap_regions(delete_region_image, region_vpcs):
+                if not valid:
                     sys.exit(1)
-                ec2 = boto.ec2.connect_to_region(region, profile_name=kwargs['profile'])
-                # In the EC2 API, filters can only express OR,
-                # so we have to implement AND by intersecting results for each filter.
-                if kwargs['vpc_id']:
-                    vpc_id = kwargs['vpc_id'][i]
-                    images_by_vpc = ec2.get_all_images(filters={'vpc-id': vpc_id})
-                    images = [img for img in images_by_vpc if img.name == ami_name]
-                else:
-                    images = ec2.get_all_images(filters={'name': ami_name})
-                if images:
-                    click.echo("Deregistering AMI with name '%s' (ID: %s) in region '%s'..." % (ami_name, images[0].id, region))
-                    images[0].deregister(delete_snapshot=True)
-                    # TODO: wait here for image to become unavailable
+                if ami_id:
+                    click.echo("Deregistered AMI with name '%s' (ID: %s) in region '%s'" % (ami_name, ami_id, region))
                 else:
                     click.secho("No AMI found in region '%s' with name '%s'" % (region, ami_name), fg='red')
         except (KeyboardInterrupt, Exception) as e:
@@ -2335,30 +3879,35 @@ def delete_image(ami_name, **kwargs):
     help="ID of the VPC (Virtual Private Cloud) in which AMI was created (can be specified multiple times, in same order as regions)")
 def list_images(**kwargs):
     verbosity = 3 if kwargs['verbose'] else 1
+
+    def list_region_images(region_vpc):
+        region, vpc_id = region_vpc
+        if not validate_aws_settings(region, kwargs['profile'], vpc_id):
+            return None
+        ec2 = get_ec2_connection(region, profile=kwargs['profile'])
+        all_images = ec2.get_all_images(filters={'tag:app': "myria"})
+        if not vpc_id:
+            return all_images
+        # In the EC2 API, filters can only express OR,
+        # so we have to implement AND by intersecting results for each filter.
+        all_image_ids = [img.id for img in all_images]
+        images_in_vpc = ec2.get_all_images(filters={'vpc-id': vpc_id})
+        return [img for img in images_in_vpc if img.id in all_image_ids]
+
+    from dateutil.parser import parse as dateparse
     try:
-        all_region_images = []
         regions = kwargs['region']
-        for i, region in enumerate(regions):
-            vpc_id = kwargs['vpc_id'][i] if kwargs['vpc_id'] else None
-            if not validate_aws_settings(region, kwargs['profile'], vpc_id):
-                sys.exit(1)
-            ec2 = boto.ec2.connect_to_region(region, profile_name=kwargs['profile'])
-            all_images = ec2.get_all_images(filters={'tag:app': "myria"})
-            all_image_ids = [img.id for img in all_images]
-            images = all_images
-            if kwargs['vpc_id']:
-                # In the EC2 API, filters can only express OR,
-                # so we have to implement AND by intersecting results for each filter.
-                images_in_vpc = ec2.get_all_images(filters={'vpc-id': kwargs['vpc_id']})
-                images = [img for img in images_in_vpc if img.id in all_image_ids]
-            all_region_images.extend(images)
-
+        region_vpcs = [(region, kwargs['vpc_id'][i] if kwargs['vpc_id'] else None) for i, region in enumerate(regions)]
         format_str = "{: <15} {: <12} {: <19} {: <30} {: <13} {: <80}"
         print(format_str.format('REGION', 'AMI_ID', 'VIRTUALIZATION_TYPE', 'NAME', 'CREATION_DATE', 'DESCRIPTION'))
         print(format_str.format('------', '------', '-------------------', '----', '-------------', '-----------'))
-        for image in all_region_images:
-            creation_date = dateparse(image.creationDate).strftime("%Y/%m/%d")
-            print(format_str.format(image.region.name, image.id, image.virtualization_type, image.name, creation_date, image.description))
+        for images in imap_regions(list_region_images, region_vpcs):
+            if images is None:
+                sys.exit(1)
+            for image in sorted(images, key=attrgetter('name')):
+                creation_date = dateparse(image.creationDate).strftime("%Y/%m/%d")
+                print(format_str.format(image.region.name, image.id, image.virtualization_type, image.name, creation_date, image.description))
+            sys.stdout.flush()
     except (KeyboardInterrupt, Exception) as e:
         if verbosity > 0:
             click.secho(str(e), fg='red')
@@ -2368,6 +3917,47 @@ def list_images(**kwargs):
         sys.exit(1)
 
 
+@run.command('timings')
+@click.option('--command', show_default=True, default='create',
+    type=click.Choice(['create', 'resize', 'start', 'update', 'create-image']),
+    help="Command whose recorded timings to report")
+@click.option('--release', default=None,
+    help="Version of this tool to report on [default: latest recorded]")
+@click.option('--top', show_default=True, default=TIMINGS_REPORT_TOP_DEFAULT, type=click.IntRange(1, None),
+    help="Number of slowest tasks to report")
+def timings(**kwargs):
+    history = load_timings_history(kwargs['command'])
+    if not history:
+        click.secho("No timings recorded for '%s' in %s." % (kwargs['command'], TIMINGS_HISTORY_FILE), fg='yellow')
+        sys.exit(1)
+    versions = []
+    for record in history:
+        if record['version'] not in versions:
+            versions.append(record['version'])
+    release = kwargs['release'] or versions[-1]
+    if release not in versions:
+        click.secho("No timings recorded for '%s' with version %s." % (kwargs['command'], release), fg='red')
+        sys.exit(1)
+
+    format_str = "{: <15} {: >5} {: >16}"
+    click.echo(format_str.format('VERSION', 'RUNS', 'MEDIAN_WALL_SECS'))
+    click.echo(format_str.format('-------', '----', '----------------'))
+    for version in versions:
+        wall_secs = [r['wall_secs'] for r in history if r['version'] == version]
+        click.echo(format_str.format(version, len(wall_secs), "%.1f" % median(wall_secs)))
+
+    # compare the median of each task in this release to the previous release
+    runs = [r for r in history if r['version'] == release]
+    task_secs = {}
+    for record in runs:
+        for task, secs in record['tasks'].iteritems():
+            task_secs.setdefault(task, []).append(secs)
+    earlier_history = [r for r in history if versions.index(r['version']) < versions.index(release)]
+    baseline_version, baseline = timings_baseline(earlier_history, release)
+    echo_task_report([(task, len(secs), median(secs), max(secs)) for task, secs in task_secs.iteritems()],
+                     baseline, baseline_version, top=kwargs['top'], headers=('RUNS', 'WORST_SECS'))
+
+
 # IMAGE ATTRIBUTES
 # root_device_type
 # ramdisk_id
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests for retrying failed hosts from their first failing task.
+
+update_checkpoints() turns the task results recorded by the myria_timings callback plugin into
+checkpoint keys, and the myria_checkpoint strategy plugin skips the tasks with those keys. The
+integration test runs a local playbook through both, so it needs the pinned Ansible release.
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import shutil
+import subprocess
+import unittest
+from tempfile import mkdtemp
+from distutils.spawn import find_executable
+
+from myria.cluster.playbooks import playbooks_dir
+from myria.cluster.scripts.cli import (update_checkpoints, load_task_timings,
+                                       CHECKPOINT_FILE_ENV_VAR, TASK_TIMINGS_FILE_ENV_VAR)
+
+
+def timing(host, task, status, play="play", role=None):
+    return dict(host=host, play=play, role=role, task=task, status=status, action="command", start=0, end=1)
+
+
+class UpdateCheckpointsTest(unittest.TestCase):
+    def test_completed_tasks(self):
+        checkpoints = {}
+        update_checkpoints(checkpoints, [timing("h1", "a", "ok"), timing("h1", "b", "changed", role="r")])
+        self.assertEqual(checkpoints, {"h1": set(["play||a", "play|r|b"])})
+
+    def test_ignored_errors_count_as_completed(self):
+        checkpoints = {}
+        update_checkpoints(checkpoints, [timing("h1", "a", "ignored")])
+        self.assertEqual(checkpoints, {"h1": set(["play||a"])})
+
+    def test_failure_removes_key_completed_before(self):
+        # e.g. two tasks with the same name in a role, the second of which failed
+        checkpoints = {}
+        update_checkpoints(checkpoints, [timing("h1", "a", "ok"), timing("h1", "a", "failed"), timing("h1", "b", "ok")])
+        self.assertEqual(checkpoints, {"h1": set(["play||b"])})
+
+    def test_failure_removes_key_from_earlier_attempt(self):
+        checkpoints = {"h1": set(["play||a"])}
+        update_checkpoints(checkpoints, [timing("h1", "a", "unreachable")])
+        self.assertEqual(checkpoints, {"h1": set()})
+
+    def test_hosts_are_independent(self):
+        checkpoints = {}
+        update_checkpoints(checkpoints, [timing("h1", "a", "ok"), timing("h2", "a", "failed"),
+                                         timing("h2", "b", "ok"), timing("h3", "a", "failed")])
+        self.assertEqual(checkpoints, {"h1": set(["play||a"]), "h2": set(["play||b"])})
+
+
+CHECKPOINT_PLAYBOOK = """
+- name: checkpoint test
+  hosts: localhost
+  gather_facts: no
+  strategy: myria_checkpoint
+  tasks:
+    - name: Recording first task
+      shell: echo run >> {{ work_dir }}/first
+    - name: Failing until ready
+      command: test -e {{ work_dir }}/ready
+"""
+
+# like the SQL script in roles/postgres: a secret file that must be there for retries, and that the
+# task reading it removes (not an always: block, which makes Ansible 2.1 report failed hosts as ok)
+CLEANUP_PLAYBOOK = """
+- name: cleanup test
+  hosts: localhost
+  gather_facts: no
+  strategy: myria_checkpoint
+  tasks:
+    - name: Writing script
+      copy: content=secret dest={{ work_dir }}/script mode=0600
+      register: script
+      changed_when: False
+    - name: Running and removing script
+      shell: trap "rm -f {{ work_dir }}/script" EXIT; cat {{ work_dir }}/script
+      register: result
+    - name: Failing until ready
+      command: test -e {{ work_dir }}/ready
+"""
+
+
+@unittest.skipUnless(find_executable("ansible-playbook"), "ansible-playbook not found")
+class CheckpointStrategyTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = mkdtemp()
+        self.timings_file = os.path.join(self.work_dir, "task_timings.json")
+        self.checkpoint_file = os.path.join(self.work_dir, "checkpoints.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def run_playbook(self, playbook):
+        playbook_path = os.path.join(self.work_dir, "playbook.yml")
+        with open(playbook_path, 'w') as f:
+            f.write(playbook)
+        env = dict(os.environ, ANSIBLE_RETRY_FILES_ENABLED="false")
+        env['ANSIBLE_STRATEGY_PLUGINS'] = os.path.join(playbooks_dir, "strategy_plugins")
+        env['ANSIBLE_CALLBACK_PLUGINS'] = os.path.join(playbooks_dir, "callback_plugins")
+        env['ANSIBLE_CALLBACK_WHITELIST'] = "myria_timings"
+        env[TASK_TIMINGS_FILE_ENV_VAR] = self.timings_file
+        env[CHECKPOINT_FILE_ENV_VAR] = self.checkpoint_file
+        extra_vars = dict(work_dir=self.work_dir, ansible_python_interpreter=sys.executable)
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.call(["ansible-playbook", playbook_path, "--inventory", "localhost,", "--connection", "local",
+                                    "--extra-vars", json.dumps(extra_vars)], env=env, stdout=devnull)
+
+    def fail_then_retry(self, playbook):
+        """Runs `playbook` until its "Failing until ready" task fails, then retries it from checkpoints."""
+        self.assertIn(self.run_playbook(playbook), [1, 2]) # Ansible 2.1 exits with 1 if every host failed
+        checkpoints = {}
+        update_checkpoints(checkpoints, load_task_timings(self.timings_file))
+        with open(self.checkpoint_file, 'w') as f:
+            json.dump(dict((host, sorted(keys)) for host, keys in checkpoints.items()), f)
+        open(os.path.join(self.work_dir, "ready"), 'w').close()
+        self.assertEqual(self.run_playbook(playbook), 0)
+        return checkpoints
+
+    def test_retry_skips_completed_task(self):
+        checkpoints = self.fail_then_retry(CHECKPOINT_PLAYBOOK)
+        self.assertEqual(checkpoints, {"localhost": set(["checkpoint test||Recording first task"])})
+        with open(os.path.join(self.work_dir, "first")) as f:
+            self.assertEqual(f.read().splitlines(), ["run"])
+
+    def test_retry_rewrites_removed_file(self):
+        self.fail_then_retry(CLEANUP_PLAYBOOK)
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "script")))
+
+
+if __name__ == '__main__':
+    unittest.main()